@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+from . import config
+
+INGEST = "ingest"
+WEBHOOK = "webhook"
+INTERACTIVE = "interactive"
+
+# Always admitted: static assets are cheap and admin endpoints must stay reachable
+_UNLIMITED_PREFIXES = ("/static", "/admin")
+_INGEST_ROUTES = {("POST", "/api/leads"), ("POST", "/api/leads/import-csv")}
+
+
+def classify(method: str, path: str) -> str | None:
+    """Maps a request to its admission class, or None if it is never limited."""
+    if path.startswith(_UNLIMITED_PREFIXES):
+        return None
+    if (method, path.rstrip("/") or "/") in _INGEST_ROUTES:
+        return INGEST
+    if path.startswith("/webhooks/"):
+        return WEBHOOK
+    # Dashboard, lead pages, reads, and the lead actions clicked from emails
+    return INTERACTIVE
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit for one route class, with a bounded wait queue.
+    A full queue is rejected immediately (429); waiting longer than
+    `queue_timeout` is rejected with 503. Runs on the event loop only.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self):
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self.rejected_queue_full += 1
+                raise Rejected(429, f"Too many {self.name} requests; try again later")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Rejected(503, f"Server busy with {self.name} requests; try again later")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+def _build_limiters() -> dict[str, AdmissionLimiter]:
+    settings = config.settings
+    limits = {
+        INGEST: settings.ADMISSION_INGEST_LIMIT,
+        WEBHOOK: settings.ADMISSION_WEBHOOK_LIMIT,
+        INTERACTIVE: settings.ADMISSION_INTERACTIVE_LIMIT,
+    }
+    return {
+        name: AdmissionLimiter(name, limit, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        for name, limit in limits.items()
+    }
+
+
+limiters = _build_limiters()
+
+
+def reserved_interactive_threads() -> int:
+    """Worker threads that ingest and webhook requests can never take."""
+    settings = config.settings
+    return settings.ADMISSION_THREADPOOL_SIZE - limiters[INGEST].limit - limiters[WEBHOOK].limit
+
+
+def configure_threadpool():
+    """
+    Sizes the worker threadpool that sync endpoints run in. Must be called
+    from the event loop (e.g. a startup handler).
+    """
+    import anyio.to_thread
+
+    settings = config.settings
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.ADMISSION_THREADPOOL_SIZE
+    if reserved_interactive_threads() < 1:
+        print(
+            "WARNING: ADMISSION_INGEST_LIMIT + ADMISSION_WEBHOOK_LIMIT leave no worker threads "
+            "for interactive requests; lower them or raise ADMISSION_THREADPOOL_SIZE."
+        )
+
+
+def stats() -> dict:
+    return {
+        "enabled": config.settings.ADMISSION_ENABLED,
+        "threadpool_size": config.settings.ADMISSION_THREADPOOL_SIZE,
+        "reserved_interactive_threads": reserved_interactive_threads(),
+        "classes": {name: limiter.stats() for name, limiter in limiters.items()},
+    }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits each request through its route class's limiter.
+    Capping ingest and webhook concurrency below the threadpool size keeps
+    worker threads free for the dashboard and lead actions during ingest spikes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[route_class]
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            await _send_rejection(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _send_rejection(send, rejection: Rejected):
+    body = json.dumps({"detail": rejection.detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": rejection.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(config.settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -7,6 +7,14 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./khwaish.db")
+    # Connection pool per engine. Pool size + overflow should cover ADMISSION_THREADPOOL_SIZE,
+    # otherwise worker threads queue on connections instead of on admission limits.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "35"))
+    # Optional comma-separated read replicas for read-only endpoints and analytics
+    READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+    # After a write, the same client reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
     
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-for-local-dev")
@@ -15,11 +23,47 @@ class Settings:
     GMAIL_CLIENT_ID = os.getenv("GMAIL_CLIENT_ID")
     GMAIL_CLIENT_SECRET = os.getenv("GMAIL_CLIENT_SECRET")
     GMAIL_REFRESH_TOKEN = os.getenv("GMAIL_REFRESH_TOKEN")
+    GMAIL_TOKEN_URI = os.getenv("GMAIL_TOKEN_URI", "https://oauth2.googleapis.com/token")
     FROM_EMAIL = os.getenv("FROM_EMAIL")
     
+    # Email delivery: "mock" prints to the console, "smtp" sends through the SMTP pool
+    EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "mock")
+    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")
+    SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+    SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+    SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+    
     # WhatsApp Webhook
     MAKE_ZAPIER_WEBHOOK_URL = os.getenv("MAKE_ZAPIER_WEBHOOK_URL")
     
+    # Idempotency-Key handling for lead ingestion
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    # An unfinished request holding a key longer than this is treated as abandoned
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "60"))
+    
+    # Request/job profiling (can also be switched at runtime via /admin/profiling)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0"))
+    PROFILING_BUFFER_SIZE = int(os.getenv("PROFILING_BUFFER_SIZE", "50"))
+    
+    # Admission control: per-class concurrency limits in front of the worker threadpool.
+    # Threads not claimable by ingest/webhook requests stay reserved for interactive routes.
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADMISSION_THREADPOOL_SIZE = int(os.getenv("ADMISSION_THREADPOOL_SIZE", "40"))
+    ADMISSION_INGEST_LIMIT = int(os.getenv("ADMISSION_INGEST_LIMIT", "8"))
+    ADMISSION_WEBHOOK_LIMIT = int(os.getenv("ADMISSION_WEBHOOK_LIMIT", "4"))
+    ADMISSION_INTERACTIVE_LIMIT = int(os.getenv("ADMISSION_INTERACTIVE_LIMIT", "28"))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2.0"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+    
+    # Token for /admin endpoints (X-Admin-Token header). They return 403 while unset.
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    
     # Application Base URL (used for reply links)
     APP_BASE_URL = os.getenv("APP_BASE_URL", "http://localhost:8000")
 
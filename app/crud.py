@@ -1,9 +1,16 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List
 
 from . import models, schemas
 
+# Columns that can be requested through the projected read path
+LEAD_FIELDS = tuple(models.Lead.__table__.columns.keys())
+# Largest page the projected read path returns; its rows are held in memory while being encoded
+MAX_LEAD_ROWS = 10000
+
 # --- Lead CRUD Operations ---
 
 def get_lead(db: Session, lead_id: int):
@@ -17,6 +24,16 @@ def get_leads(db: Session, status: models.LeadStatus | None = None, source: str
         query = query.filter(models.Lead.source == source)
     return query.offset(skip).limit(limit).all()
 
+def get_lead_rows(db: Session, fields: List[str], status: models.LeadStatus | None = None, source: str | None = None, skip: int = 0, limit: int = 100) -> List[tuple]:
+    """Like get_leads, but selects only `fields` as plain rows, skipping ORM object hydration."""
+    table = models.Lead.__table__
+    query = select(*[table.c[field] for field in fields])
+    if status:
+        query = query.where(table.c.status == status)
+    if source:
+        query = query.where(table.c.source == source)
+    return db.execute(query.offset(skip).limit(limit)).all()
+
 def create_lead(db: Session, lead: schemas.LeadCreate):
     db_lead = models.Lead(
         name=lead.name,
@@ -35,13 +52,14 @@ def create_lead(db: Session, lead: schemas.LeadCreate):
 
 # --- MessageLog CRUD Operations ---
 
-def log_message(db: Session, lead_id: int, channel: str, kind: str, success: bool, provider_response: str | None = None):
+def log_message(db: Session, lead_id: int, channel: str, kind: str, success: bool, provider_response: str | None = None, provider_message_id: str | None = None):
     db_log = models.MessageLog(
         lead_id=lead_id,
         channel=models.MessageChannel(channel),
         kind=models.MessageKind(kind),
         success=success,
         provider_response=provider_response,
+        provider_message_id=provider_message_id,
         sent_at=datetime.utcnow()
     )
     db.add(db_log)
@@ -51,3 +69,44 @@ def log_message(db: Session, lead_id: int, channel: str, kind: str, success: boo
 
 def get_message_logs_for_lead(db: Session, lead_id: int) -> List[models.MessageLog]:
     return db.query(models.MessageLog).filter(models.MessageLog.lead_id == lead_id).order_by(models.MessageLog.sent_at.desc()).all()
+
+# --- IdempotencyKey CRUD Operations ---
+
+def get_idempotency_key(db: Session, key: str) -> models.IdempotencyKey | None:
+    return db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+
+def claim_idempotency_key(db: Session, key: str, request_hash: str) -> bool:
+    """Inserts an in-progress row for `key`. Returns False if the key already exists."""
+    db.add(models.IdempotencyKey(key=key, request_hash=request_hash, created_at=datetime.utcnow()))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+def take_over_idempotency_key(db: Session, key: str, request_hash: str, stale_before: datetime) -> bool:
+    """Re-claims an unfinished key whose original request started before `stale_before`."""
+    updated = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.status_code.is_(None),
+        models.IdempotencyKey.created_at < stale_before
+    ).update({"request_hash": request_hash, "created_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return updated == 1
+
+def complete_idempotency_key(db: Session, key: str, status_code: int, response_body: str):
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).update(
+        {"status_code": status_code, "response_body": response_body, "completed_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+
+def delete_idempotency_key(db: Session, key: str):
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).delete(synchronize_session=False)
+    db.commit()
+
+def purge_idempotency_keys(db: Session, created_before: datetime) -> int:
+    deleted = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.created_at < created_before).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,4 +1,7 @@
+import itertools
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -6,9 +9,32 @@ from .config import settings
 # Use the configured database URL
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+def _pool_args(url: str) -> dict:
+    """Pool sizing for dialects that use QueuePool (in-memory SQLite uses SingletonThreadPool)."""
+    parsed_url = make_url(url)
+    if issubclass(parsed_url.get_dialect().get_pool_class(parsed_url), QueuePool):
+        return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+    return {}
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {},
+        **_pool_args(url)
+    )
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (optional). Tables are managed on the primary only.
+read_engines = [_create_engine(url) for url in settings.READ_REPLICA_URLS]
+_read_sessionmakers = [sessionmaker(autocommit=False, autoflush=False, bind=read_engine) for read_engine in read_engines]
+_next_replica = itertools.count()
+
+def get_read_sessionmaker() -> sessionmaker:
+    """Returns the next replica's sessionmaker (round-robin), or the primary's if none are configured."""
+    if not _read_sessionmakers:
+        return SessionLocal
+    return _read_sessionmakers[next(_next_replica) % len(_read_sessionmakers)]
+
 Base = declarative_base()
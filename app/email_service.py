@@ -1,7 +1,10 @@
 import requests
 from fastapi.templating import Jinja2Templates
 from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 from . import models, config
+from .smtp_sender import EmailResult, get_smtp_pool
 
 # Templates are loaded from the main app
 templates = Jinja2Templates(directory="app/templates")
@@ -33,10 +36,25 @@ def _render_email_content(lead: models.Lead, kind: str) -> dict:
     
     return {"subject": subject, "html_body": html_body}
 
-def _send_email(to_email: str, subject: str, html_body: str) -> bool:
+def _build_message(to_email: str, subject: str, html_body: str, in_reply_to: str | None = None) -> EmailMessage:
+    """Builds the MIME message, with a Message-ID we can log and thread replies on."""
+    from_email = config.settings.FROM_EMAIL
+    msg = EmailMessage()
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid(domain=from_email.split("@")[-1] if from_email else None)
+    if in_reply_to:
+        msg["In-Reply-To"] = in_reply_to
+        msg["References"] = in_reply_to
+    msg.set_content(html_body, subtype="html")
+    return msg
+
+def _send_mock_email(to_email: str, subject: str, html_body: str) -> EmailResult:
     """
     MOCK function for sending email.
-    In a real application, this would use the Gmail API or SMTP.
+    Used when EMAIL_BACKEND is "mock" (the default).
     """
     print(f"\n--- MOCK EMAIL SENT ---")
     print(f"TO: {to_email}")
@@ -46,22 +64,63 @@ def _send_email(to_email: str, subject: str, html_body: str) -> bool:
     print(f"-----------------------\n")
     
     # Assume success for the mock
-    return True
+    return EmailResult(True, None, "Mock email sent")
+
+def _send_emails(emails: list[dict]) -> list[EmailResult]:
+    """
+    Sends a batch of emails, each a dict with to_email, subject, html_body and
+    optional in_reply_to. With the SMTP backend the batch is spread across the
+    pooled connections.
+    """
+    if config.settings.EMAIL_BACKEND == "smtp":
+        return get_smtp_pool().send_batch([_build_message(**email) for email in emails])
+    return [_send_mock_email(email["to_email"], email["subject"], email["html_body"]) for email in emails]
+
+def _send_email(to_email: str, subject: str, html_body: str, in_reply_to: str | None = None) -> EmailResult:
+    return _send_emails([{"to_email": to_email, "subject": subject, "html_body": html_body, "in_reply_to": in_reply_to}])[0]
+
+def _send_lead_emails(leads: list[models.Lead], kind: str) -> list[EmailResult]:
+    """Renders and sends one email of `kind` per lead. Render failures only fail that lead."""
+    results: list[EmailResult | None] = [None] * len(leads)
+    emails = []
+    positions = []
+    for i, lead in enumerate(leads):
+        try:
+            content = _render_email_content(lead, kind)
+        except Exception as e:
+            print(f"Error rendering {kind} email to {lead.email}: {e}")
+            results[i] = EmailResult(False, None, f"Render failed: {e}")
+            continue
+        emails.append({
+            "to_email": lead.email,
+            "subject": content["subject"],
+            "html_body": content["html_body"],
+            # Reminders reply into the first-touch thread
+            "in_reply_to": lead.email_thread_id if kind == "reminder" else None,
+        })
+        positions.append(i)
 
-def send_first_contact_email(lead: models.Lead) -> bool:
-    """Sends the initial contact email to the lead."""
     try:
-        content = _render_email_content(lead, "first")
-        return _send_email(lead.email, content["subject"], content["html_body"])
+        sent = _send_emails(emails)
     except Exception as e:
-        print(f"Error sending first contact email to {lead.email}: {e}")
-        return False
+        print(f"Error sending {kind} emails: {e}")
+        sent = [EmailResult(False, None, str(e))] * len(emails)
+    for i, result in zip(positions, sent):
+        results[i] = result
+    return results
 
-def send_reminder_email(lead: models.Lead) -> bool:
+def send_first_contact_email(lead: models.Lead) -> EmailResult:
+    """Sends the initial contact email to the lead."""
+    return _send_lead_emails([lead], "first")[0]
+
+def send_reminder_email(lead: models.Lead) -> EmailResult:
     """Sends the reminder email to the lead."""
-    try:
-        content = _render_email_content(lead, "reminder")
-        return _send_email(lead.email, content["subject"], content["html_body"])
-    except Exception as e:
-        print(f"Error sending reminder email to {lead.email}: {e}")
-        return False
+    return _send_lead_emails([lead], "reminder")[0]
+
+def send_first_contact_emails(leads: list[models.Lead]) -> list[EmailResult]:
+    """Sends initial contact emails to many leads in one batch."""
+    return _send_lead_emails(leads, "first")
+
+def send_reminder_emails(leads: list[models.Lead]) -> list[EmailResult]:
+    """Sends reminder emails to many leads in one batch."""
+    return _send_lead_emails(leads, "reminder")
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from . import crud, config
+from .serializers import dumps
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: str
+
+
+class IdempotencyConflict(Exception):
+    """Raised when a key is in use by an unfinished request or was used for a different payload."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyCache:
+    """
+    Bounded in-memory LRU cache of completed responses with a per-entry TTL.
+    Sits in front of the idempotency_keys table so hot retries skip the database.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> StoredResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: str, response: StoredResponse, ttl_seconds: float | None = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+cache = IdempotencyCache(config.settings.IDEMPOTENCY_CACHE_SIZE, config.settings.IDEMPOTENCY_TTL_SECONDS)
+
+# Lookups that missed the cache but found a completed response in the table
+_store_hits = 0
+_store_lock = threading.Lock()
+
+
+def request_fingerprint(payload) -> str:
+    """Hashes the request payload so a reused key with a different body can be rejected."""
+    return hashlib.sha256(dumps(payload)).hexdigest()
+
+
+def _remaining_ttl(created_at: datetime | None) -> float:
+    if created_at is None:
+        return config.settings.IDEMPOTENCY_TTL_SECONDS
+    age = (datetime.utcnow() - created_at.replace(tzinfo=None)).total_seconds()
+    return config.settings.IDEMPOTENCY_TTL_SECONDS - age
+
+
+def _check_hash(stored: StoredResponse, request_hash: str) -> StoredResponse:
+    if stored.request_hash != request_hash:
+        raise IdempotencyConflict(422, "Idempotency-Key was already used with a different request body")
+    return stored
+
+
+def begin(db: Session, key: str, request_hash: str) -> StoredResponse | None:
+    """
+    Starts an idempotent request. Returns the stored response if `key` has already
+    completed, or None after claiming the key for this request. Raises
+    IdempotencyConflict if another request holds the key or the payload differs.
+    """
+    global _store_hits
+
+    stored = cache.get(key)
+    if stored is not None:
+        return _check_hash(stored, request_hash)
+
+    if crud.claim_idempotency_key(db, key, request_hash):
+        return None
+
+    row = crud.get_idempotency_key(db, key)
+    if row is None:
+        # Purged between our insert attempt and the lookup; try once more
+        if crud.claim_idempotency_key(db, key, request_hash):
+            return None
+        raise IdempotencyConflict(409, "A request with this Idempotency-Key is already in progress")
+
+    if row.status_code is not None:
+        ttl = _remaining_ttl(row.created_at)
+        if ttl > 0:
+            stored = StoredResponse(row.request_hash, row.status_code, row.response_body)
+            cache.put(key, stored, ttl)
+            with _store_lock:
+                _store_hits += 1
+            return _check_hash(stored, request_hash)
+        # Expired but not purged yet: start over under the same key
+        crud.delete_idempotency_key(db, key)
+        if crud.claim_idempotency_key(db, key, request_hash):
+            return None
+        raise IdempotencyConflict(409, "A request with this Idempotency-Key is already in progress")
+
+    stale_before = datetime.utcnow() - timedelta(seconds=config.settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+    if crud.take_over_idempotency_key(db, key, request_hash, stale_before):
+        return None
+    raise IdempotencyConflict(409, "A request with this Idempotency-Key is already in progress")
+
+
+def complete(db: Session, key: str, request_hash: str, status_code: int, body: str):
+    """Stores the final response for `key` in the table and the cache."""
+    crud.complete_idempotency_key(db, key, status_code, body)
+    cache.put(key, StoredResponse(request_hash, status_code, body))
+
+
+def abandon(db: Session, key: str):
+    """Releases the claim on `key` after a failed request so a retry can run it again."""
+    db.rollback()
+    crud.delete_idempotency_key(db, key)
+
+
+def purge_expired(db: Session) -> int:
+    """Deletes idempotency keys older than the TTL. Returns the number removed."""
+    return crud.purge_idempotency_keys(db, datetime.utcnow() - timedelta(seconds=config.settings.IDEMPOTENCY_TTL_SECONDS))
+
+
+def metrics() -> dict:
+    stats = cache.stats()
+    with _store_lock:
+        stats["store_hits"] = _store_hits
+    return stats
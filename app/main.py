@@ -1,14 +1,23 @@
 import uvicorn
-from fastapi import FastAPI, Request, Depends, HTTPException, status
+from fastapi import FastAPI, Request, Response, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+import hmac
 import os
+import time
 
-from . import models, schemas, crud, config
-from .db import SessionLocal, engine
-from .email_service import send_first_contact_email, send_reminder_email
+from . import models, schemas, crud, config, idempotency, admission
+from .db import SessionLocal, engine, get_read_sessionmaker, read_engines
+from .email_service import send_first_contact_email, send_first_contact_emails, send_reminder_email
+from .smtp_sender import close_smtp_pool
+from .serializers import dumps, iter_json_array
+from .profiling import ProfilingMiddleware, profiled, profiler
 from .whatsapp_service import trigger_whatsapp_message
 from .scheduler import start_scheduler, schedule_reminder_check
 
@@ -22,6 +31,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Zero-cost unless profiling is switched on (see /admin/profiling)
+app.add_middleware(ProfilingMiddleware)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
@@ -34,9 +46,61 @@ def get_db():
     finally:
         db.close()
 
+# Set on successful writes so the same client keeps reading from the primary for a while
+LAST_WRITE_COOKIE = "khwaish_last_write"
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < config.settings.READ_YOUR_WRITES_SECONDS
+
+# Dependency to get a session for read-only endpoints
+def get_read_db(request: Request):
+    """
+    Yields a read-replica session, or a primary session when no replicas are
+    configured, the client wrote within READ_YOUR_WRITES_SECONDS, or the
+    replica cannot be reached.
+    """
+    read_sessionmaker = SessionLocal if _wrote_recently(request) else get_read_sessionmaker()
+    db = read_sessionmaker()
+    if read_sessionmaker is not SessionLocal:
+        try:
+            db.connection()
+        except OperationalError as e:
+            print(f"WARNING: Read replica unavailable, falling back to primary. Error: {e}")
+            db.close()
+            db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def track_writes(request: Request, call_next):
+    """Marks clients that just wrote, for read-your-writes routing in get_read_db."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(time.time()),
+            max_age=config.settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+if read_engines:
+    app.middleware("http")(track_writes)
+
+# Registered after every other middleware so it is the outermost layer: rejected requests do no other work
+if config.settings.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+
 # --- Startup and Shutdown Events ---
 @app.on_event("startup")
 async def startup_event():
+    admission.configure_threadpool()
     print("Starting scheduler...")
     start_scheduler()
     schedule_reminder_check()
@@ -44,21 +108,60 @@ async def startup_event():
 @app.on_event("shutdown")
 def shutdown_event():
     print("Shutting down...")
+    close_smtp_pool()
 
 # --- API Endpoints ---
 
 @app.post("/api/leads", response_model=schemas.Lead)
-def create_lead_api(lead_in: schemas.LeadCreate, db: Session = Depends(get_db)):
+@profiled
+def create_lead_api(lead_in: schemas.LeadCreate, idempotency_key: str | None = Header(None), db: Session = Depends(get_db)):
     """
     Endpoint to create a new lead (e.g., from a web form).
     Triggers the initial contact automation.
+    
+    Clients that retry (web forms, ad-platform webhooks) should send an
+    `Idempotency-Key` header: a retry with the same key returns the original
+    response without creating the lead or sending outreach again.
     """
-    db_lead = crud.create_lead(db=db, lead=lead_in)
+    if not idempotency_key:
+        return _contact_lead(db, crud.create_lead(db=db, lead=lead_in))
+    
+    request_hash = idempotency.request_fingerprint(jsonable_encoder(lead_in))
+    try:
+        stored = idempotency.begin(db, idempotency_key, request_hash)
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if stored is not None:
+        return Response(content=stored.body, status_code=stored.status_code, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+    
+    try:
+        db_lead = crud.create_lead(db=db, lead=lead_in)
+    except Exception:
+        # Nothing was sent yet, so a retry can safely run the request again
+        idempotency.abandon(db, idempotency_key)
+        raise
+    
+    try:
+        _contact_lead(db, db_lead)
+    except Exception:
+        # The email or WhatsApp may already have gone out: store the failure so a
+        # retry replays it instead of contacting the lead a second time
+        db.rollback()
+        body = dumps({"detail": "Lead was created but its initial contact failed; do not retry"}).decode()
+        idempotency.complete(db, idempotency_key, request_hash, status.HTTP_500_INTERNAL_SERVER_ERROR, body)
+        raise
     
+    body = dumps({field: getattr(db_lead, field) for field in crud.LEAD_FIELDS}).decode()
+    idempotency.complete(db, idempotency_key, request_hash, status.HTTP_200_OK, body)
+    return Response(content=body, media_type="application/json")
+
+def _contact_lead(db: Session, db_lead: models.Lead) -> models.Lead:
+    """Runs Automation Flow A (initial contact) for a newly created lead."""
     # --- Automation Flow A: Initial Contact ---
     
     # 1. Send Email
-    email_success = send_first_contact_email(db_lead)
+    email_result = send_first_contact_email(db_lead)
+    email_success = email_result.success
     
     # 2. Trigger WhatsApp
     whatsapp_success = trigger_whatsapp_message(db_lead, "FIRST_TOUCH")
@@ -66,6 +169,7 @@ def create_lead_api(lead_in: schemas.LeadCreate, db: Session = Depends(get_db)):
     # 3. Update DB
     db_lead.status = models.LeadStatus.CONTACTED
     db_lead.first_contact_at = datetime.utcnow()
+    db_lead.email_thread_id = email_result.message_id
     db_lead.email_sent_at = datetime.utcnow() if email_success else None
     db_lead.whatsapp_sent_at = datetime.utcnow() if whatsapp_success else None
     db_lead.last_touch_at = datetime.utcnow()
@@ -74,12 +178,13 @@ def create_lead_api(lead_in: schemas.LeadCreate, db: Session = Depends(get_db)):
     db.refresh(db_lead)
     
     # Log messages (simplified for now, full logging in crud)
-    crud.log_message(db, db_lead.id, "EMAIL", "FIRST_TOUCH", email_success, "Email sent successfully" if email_success else "Email failed")
+    crud.log_message(db, db_lead.id, "EMAIL", "FIRST_TOUCH", email_success, email_result.provider_response, email_result.message_id)
     crud.log_message(db, db_lead.id, "WHATSAPP", "FIRST_TOUCH", whatsapp_success, "WhatsApp triggered successfully" if whatsapp_success else "WhatsApp trigger failed")
     
     return db_lead
 
 @app.post("/api/leads/import-csv", response_model=list[schemas.Lead])
+@profiled
 async def import_csv(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint to import leads from a CSV file.
@@ -96,53 +201,87 @@ async def import_csv(request: Request, db: Session = Depends(get_db)):
     content = await csv_file.read()
     content_str = content.decode('utf-8')
     
+    # DB commits and email/webhook calls block; run them in the worker threadpool, not on the event loop
+    return await run_in_threadpool(_import_leads, db, content_str)
+
+@profiled
+def _import_leads(db: Session, content_str: str) -> list[models.Lead]:
+    """Creates leads from CSV text and runs the initial contact automation for each."""
     imported_leads = []
-    # Skip header row
-    for line in content_str.strip().split('\n')[1:]:
-        parts = line.split(',')
-        if len(parts) >= 4:
-            lead_in = schemas.LeadCreate(
-                name=parts[0].strip(),
-                email=parts[1].strip(),
-                phone=parts[2].strip(),
-                source=parts[3].strip(),
-                message=parts[4].strip() if len(parts) > 4 else None
-            )
-            db_lead = crud.create_lead(db=db, lead=lead_in)
-            
-            # Trigger automation (same as create_lead_api)
-            email_success = send_first_contact_email(db_lead)
-            whatsapp_success = trigger_whatsapp_message(db_lead, "FIRST_TOUCH")
-            
-            db_lead.status = models.LeadStatus.CONTACTED
-            db_lead.first_contact_at = datetime.utcnow()
-            db_lead.email_sent_at = datetime.utcnow() if email_success else None
-            db_lead.whatsapp_sent_at = datetime.utcnow() if whatsapp_success else None
-            db_lead.last_touch_at = datetime.utcnow()
-            
-            db.commit()
-            db.refresh(db_lead)
-            
-            crud.log_message(db, db_lead.id, "EMAIL", "FIRST_TOUCH", email_success, "Email sent successfully" if email_success else "Email failed")
-            crud.log_message(db, db_lead.id, "WHATSAPP", "FIRST_TOUCH", whatsapp_success, "WhatsApp triggered successfully" if whatsapp_success else "WhatsApp trigger failed")
-            
-            imported_leads.append(db_lead)
-            
+    try:
+        # Skip header row
+        for line in content_str.strip().split('\n')[1:]:
+            parts = line.split(',')
+            if len(parts) >= 4:
+                lead_in = schemas.LeadCreate(
+                    name=parts[0].strip(),
+                    email=parts[1].strip(),
+                    phone=parts[2].strip(),
+                    source=parts[3].strip(),
+                    message=parts[4].strip() if len(parts) > 4 else None
+                )
+                imported_leads.append(crud.create_lead(db=db, lead=lead_in))
+    except Exception:
+        # A bad row (e.g. a duplicate email) fails the import, but the leads already
+        # committed must still be contacted, or they stay NEW and are never reminded
+        db.rollback()
+        _contact_imported_leads(db, imported_leads)
+        raise
+    
+    _contact_imported_leads(db, imported_leads)
     return imported_leads
 
-@app.get("/api/leads", response_model=list[schemas.Lead])
+def _contact_imported_leads(db: Session, imported_leads: list[models.Lead]):
+    """Runs Automation Flow A for imported leads, with the emails sent as one batch."""
+    email_results = send_first_contact_emails(imported_leads)
+    
+    for db_lead, email_result in zip(imported_leads, email_results):
+        email_success = email_result.success
+        whatsapp_success = trigger_whatsapp_message(db_lead, "FIRST_TOUCH")
+        
+        db_lead.status = models.LeadStatus.CONTACTED
+        db_lead.first_contact_at = datetime.utcnow()
+        db_lead.email_thread_id = email_result.message_id
+        db_lead.email_sent_at = datetime.utcnow() if email_success else None
+        db_lead.whatsapp_sent_at = datetime.utcnow() if whatsapp_success else None
+        db_lead.last_touch_at = datetime.utcnow()
+        
+        db.commit()
+        db.refresh(db_lead)
+        
+        crud.log_message(db, db_lead.id, "EMAIL", "FIRST_TOUCH", email_success, email_result.provider_response, email_result.message_id)
+        crud.log_message(db, db_lead.id, "WHATSAPP", "FIRST_TOUCH", whatsapp_success, "WhatsApp triggered successfully" if whatsapp_success else "WhatsApp trigger failed")
+
+@app.get("/api/leads", response_model=list[schemas.Lead] | list[schemas.LeadFields])
+@profiled
 def list_leads(
     status: models.LeadStatus | None = None,
     source: str | None = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List leads with optional filtering."""
+    """
+    List leads with optional filtering.
+    Pass `fields` (comma-separated, e.g. `id,name,status`) to get objects with only
+    those keys instead of full leads. That path skips ORM objects and schema
+    validation, streams the JSON out, and allows `limit` up to 10000.
+    """
+    if fields:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in field_list if field not in crud.LEAD_FIELDS]
+        if unknown or not field_list:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {fields}. Allowed: {', '.join(crud.LEAD_FIELDS)}")
+        if limit > crud.MAX_LEAD_ROWS:
+            raise HTTPException(status_code=400, detail=f"limit must be at most {crud.MAX_LEAD_ROWS} when fields is set")
+        rows = crud.get_lead_rows(db, field_list, status=status, source=source, skip=skip, limit=limit)
+        return StreamingResponse(iter_json_array(field_list, rows), media_type="application/json")
     return crud.get_leads(db, status=status, source=source, skip=skip, limit=limit)
 
 @app.get("/api/leads/{lead_id}", response_model=schemas.Lead)
-def get_lead_detail(lead_id: int, db: Session = Depends(get_db)):
+@profiled
+def get_lead_detail(lead_id: int, db: Session = Depends(get_read_db)):
     """Get details for a specific lead."""
     db_lead = crud.get_lead(db, lead_id=lead_id)
     if db_lead is None:
@@ -150,6 +289,7 @@ def get_lead_detail(lead_id: int, db: Session = Depends(get_db)):
     return db_lead
 
 @app.post("/api/leads/{lead_id}/mark-replied", response_model=schemas.Lead)
+@profiled
 def mark_lead_replied(lead_id: int, db: Session = Depends(get_db)):
     """
     Endpoint to manually mark a lead as replied, or hit by the 'reply link' in the email.
@@ -168,6 +308,7 @@ def mark_lead_replied(lead_id: int, db: Session = Depends(get_db)):
     return db_lead
 
 @app.post("/api/leads/{lead_id}/send-reminder", response_model=schemas.Lead)
+@profiled
 def send_manual_reminder(lead_id: int, db: Session = Depends(get_db)):
     """
     Endpoint to manually send a reminder email and WhatsApp message.
@@ -177,7 +318,8 @@ def send_manual_reminder(lead_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lead not found")
     
     # Send Email
-    email_success = send_reminder_email(db_lead)
+    email_result = send_reminder_email(db_lead)
+    email_success = email_result.success
     
     # Trigger WhatsApp
     whatsapp_success = trigger_whatsapp_message(db_lead, "REMINDER")
@@ -191,12 +333,13 @@ def send_manual_reminder(lead_id: int, db: Session = Depends(get_db)):
     db.refresh(db_lead)
     
     # Log messages
-    crud.log_message(db, db_lead.id, "EMAIL", "REMINDER", email_success, "Reminder email sent successfully" if email_success else "Reminder email failed")
+    crud.log_message(db, db_lead.id, "EMAIL", "REMINDER", email_success, email_result.provider_response, email_result.message_id)
     crud.log_message(db, db_lead.id, "WHATSAPP", "REMINDER", whatsapp_success, "Reminder WhatsApp triggered successfully" if whatsapp_success else "Reminder WhatsApp trigger failed")
     
     return db_lead
 
 @app.post("/api/leads/{lead_id}/update-status", response_model=schemas.Lead)
+@profiled
 def update_lead_status(lead_id: int, status_update: schemas.LeadStatusUpdate, db: Session = Depends(get_db)):
     """
     Endpoint to manually update a lead's status (WON/LOST/IN_PROGRESS).
@@ -213,7 +356,8 @@ def update_lead_status(lead_id: int, status_update: schemas.LeadStatusUpdate, db
     return db_lead
 
 @app.get("/api/kpis")
-def get_kpis(db: Session = Depends(get_db)):
+@profiled
+def get_kpis(db: Session = Depends(get_read_db)):
     """Calculate and return key performance indicators."""
     total_leads = db.query(models.Lead).count()
     contacted = db.query(models.Lead).filter(models.Lead.status == models.LeadStatus.CONTACTED).count()
@@ -235,18 +379,21 @@ def get_kpis(db: Session = Depends(get_db)):
 # --- Web Dashboard Endpoints ---
 
 @app.get("/")
-def dashboard(request: Request, db: Session = Depends(get_db)):
+@profiled
+def dashboard(request: Request, db: Session = Depends(get_read_db)):
     """Dashboard page with KPIs and leads table."""
     kpis = get_kpis(db)
     leads = crud.get_leads(db, limit=20) # Show top 20 for dashboard view
     
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {"request": request, "kpis": kpis, "leads": leads, "statuses": [s.value for s in models.LeadStatus]}
     )
 
 @app.get("/lead/{lead_id}")
-def lead_detail_page(request: Request, lead_id: int, db: Session = Depends(get_db)):
+@profiled
+def lead_detail_page(request: Request, lead_id: int, db: Session = Depends(get_read_db)):
     """Lead detail page showing timeline and actions."""
     db_lead = crud.get_lead(db, lead_id=lead_id)
     if db_lead is None:
@@ -255,6 +402,7 @@ def lead_detail_page(request: Request, lead_id: int, db: Session = Depends(get_d
     messages = crud.get_message_logs_for_lead(db, lead_id=lead_id)
     
     return templates.TemplateResponse(
+        request,
         "lead_detail.html",
         {"request": request, "lead": db_lead, "messages": messages, "statuses": [s.value for s in models.LeadStatus]}
     )
@@ -262,6 +410,7 @@ def lead_detail_page(request: Request, lead_id: int, db: Session = Depends(get_d
 # --- Webhook Endpoints (Placeholder) ---
 
 @app.post("/webhooks/whatsapp-status")
+@profiled
 def whatsapp_status_webhook(status_update: schemas.WhatsAppStatusUpdate, db: Session = Depends(get_db)):
     """
     Webhook to receive delivery status updates from WhatsApp provider (via Make/Zapier).
@@ -274,6 +423,70 @@ def whatsapp_status_webhook(status_update: schemas.WhatsAppStatusUpdate, db: Ses
     
     return {"message": "Status received"}
 
+# --- Admin Endpoints ---
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    admin_token = config.settings.ADMIN_TOKEN
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+def profiling_status():
+    """Profiler settings and summaries of the buffered profiles, newest first."""
+    return profiler.status()
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+def configure_profiling(settings_update: schemas.ProfilingUpdate):
+    """
+    Switches profiling on or off at runtime and sets the sample rate.
+    Requests sent with an `X-Profile` header are always sampled while enabled.
+    """
+    profiler.configure(
+        enabled=settings_update.enabled,
+        sample_rate=settings_update.sample_rate,
+        buffer_size=settings_update.buffer_size
+    )
+    return profiler.status()
+
+@app.delete("/admin/profiling", dependencies=[Depends(require_admin)])
+def clear_profiles():
+    """Empties the profile buffer."""
+    profiler.clear()
+    return {"message": "Profiles cleared"}
+
+@app.get("/admin/profiling/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: int):
+    """SQL statement timings and the top functions by cumulative time for one profile."""
+    record = profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return record.detail()
+
+@app.get("/admin/profiling/{profile_id}/pstats", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: int):
+    """Downloads the cProfile data, loadable with `pstats.Stats(path)` or snakeviz."""
+    record = profiler.get(profile_id)
+    data = record.pstats_dump() if record is not None else None
+    if data is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+    )
+
+@app.get("/admin/idempotency", dependencies=[Depends(require_admin)])
+def idempotency_metrics():
+    """Hit/miss counters for the idempotency-key cache."""
+    return idempotency.metrics()
+
+@app.get("/admin/admission", dependencies=[Depends(require_admin)])
+def admission_status():
+    """Per-class admission limits, current load and rejection counters."""
+    return admission.stats()
+
 # --- CLI for Scheduler (for external cron/systemd) ---
 if __name__ == "__main__":
     # This block is for running the scheduler as a standalone process
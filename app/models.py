@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -59,7 +59,21 @@ class MessageLog(Base):
     
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
     provider_response = Column(String, nullable=True)
+    provider_message_id = Column(String, nullable=True, index=True)
     success = Column(Boolean, default=False)
     
     # Relationship to Lead
     lead = relationship("Lead", back_populates="messages")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String, primary_key=True)
+    request_hash = Column(String)
+    
+    # NULL until the original request finishes
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), index=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,312 @@
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import config
+
+# Cap what a single profile keeps so one pathological request can't bloat the buffer
+MAX_SQL_STATEMENTS = 500
+MAX_STATEMENT_LENGTH = 1000
+TOP_FUNCTIONS = 30
+
+
+# Held while a cProfile profiler is running. Python 3.12+ allows only one
+# profiler per interpreter, so overlapping sampled requests and nested
+# @profiled calls skip cProfile (their SQL timings are still recorded).
+_cprofile_lock = threading.Lock()
+
+
+class ProfileRecord:
+    """Timings for one profiled request or scheduler job run."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, name: str):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.name = name
+        self.started_at = datetime.utcnow()
+        self.status_code: int | None = None
+        self.duration_ms: float | None = None
+        self.sql: list[dict] = []
+        self.sql_count = 0
+        self.sql_total_ms = 0.0
+        self._start = time.perf_counter()
+        self._stats: pstats.Stats | None = None
+        self._lock = threading.Lock()
+
+    def add_sql(self, statement: str, duration_ms: float):
+        with self._lock:
+            self.sql_count += 1
+            self.sql_total_ms += duration_ms
+            if len(self.sql) < MAX_SQL_STATEMENTS:
+                self.sql.append({"statement": statement[:MAX_STATEMENT_LENGTH], "duration_ms": round(duration_ms, 3)})
+
+    @contextmanager
+    def profile_thread(self):
+        """
+        Runs the block under cProfile in the current thread and merges the result.
+        If another profiler is already running, the block runs unprofiled.
+        """
+        if not _cprofile_lock.acquire(blocking=False):
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (e.g. a debugger or coverage) is active
+            _cprofile_lock.release()
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _cprofile_lock.release()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def finish(self, status_code: int | None = None):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        self.status_code = status_code
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at.isoformat() + "Z",
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+            "sql_count": self.sql_count,
+            "sql_total_ms": round(self.sql_total_ms, 3),
+        }
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        stats.add(self._stats)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def detail(self) -> dict:
+        detail = self.summary()
+        detail["sql"] = self.sql
+        detail["top_functions"] = self.top_functions()
+        return detail
+
+    def pstats_dump(self) -> bytes | None:
+        """The profile in the binary format written by pstats.Stats.dump_stats()."""
+        if self._stats is None:
+            return None
+        return marshal.dumps(self._stats.stats)
+
+
+class Profiler:
+    """
+    Runtime-switchable request/job profiler. When disabled, the middleware,
+    decorators and job wrappers fall straight through and no SQL hooks are
+    installed.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float, buffer_size: int):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.records: deque[ProfileRecord] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._hooks_installed = False
+        if enabled:
+            self.enable()
+
+    def configure(self, enabled: bool | None = None, sample_rate: float | None = None, buffer_size: int | None = None):
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+            if buffer_size is not None and buffer_size != self.records.maxlen:
+                self.records = deque(self.records, maxlen=buffer_size)
+        if enabled is True:
+            self.enable()
+        elif enabled is False:
+            self.disable()
+
+    def enable(self):
+        with self._lock:
+            if not self._hooks_installed:
+                event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+                self._hooks_installed = True
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._hooks_installed:
+                event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+                event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+                self._hooks_installed = False
+
+    def should_sample(self, tagged: bool) -> bool:
+        return self.enabled and (tagged or (self.sample_rate > 0 and random.random() < self.sample_rate))
+
+    def add(self, record: ProfileRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def get(self, record_id: int) -> ProfileRecord | None:
+        with self._lock:
+            for record in self.records:
+                if record.id == record_id:
+                    return record
+        return None
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "buffer_size": self.records.maxlen,
+                "profiles": [record.summary() for record in reversed(self.records)],
+            }
+
+
+# The record for the request or job being profiled in this context, if any
+_current: ContextVar[ProfileRecord | None] = ContextVar("current_profile", default=None)
+
+
+# --- SQL statement timing ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = _current.get()
+    if record is not None:
+        starts = conn.info.get("profile_query_start")
+        if starts:
+            record.add_sql(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+profiler = Profiler(
+    config.settings.PROFILING_ENABLED,
+    config.settings.PROFILING_SAMPLE_RATE,
+    config.settings.PROFILING_BUFFER_SIZE,
+)
+
+
+# --- Request profiling ---
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that samples requests for profiling: a `sample_rate`
+    fraction of all requests, plus any request sent with an `X-Profile` header.
+    SQL timings are collected for the whole request; endpoints decorated with
+    @profiled also get a cProfile profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tagged = any(name == PROFILE_HEADER for name, _ in scope.get("headers", ()))
+        if not profiler.should_sample(tagged):
+            await self.app(scope, receive, send)
+            return
+
+        record = ProfileRecord("request", f"{scope['method']} {scope['path']}")
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = _current.set(record)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            record.finish(status_code)
+            profiler.add(record)
+
+
+def profiled(func):
+    """
+    Profiles the endpoint with cProfile when the current request was sampled.
+    Works for sync endpoints (run in the threadpool) and async ones. Async
+    endpoints are profiled on the event loop thread, so other requests running
+    concurrently on the loop can appear in their profile.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            record = _current.get()
+            if record is None:
+                return await func(*args, **kwargs)
+            with record.profile_thread():
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        record = _current.get()
+        if record is None:
+            return func(*args, **kwargs)
+        with record.profile_thread():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# --- Scheduler job profiling ---
+
+def profiled_job(job_id: str, func):
+    """Wraps a scheduler job so every run is profiled while profiling is enabled."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        record = ProfileRecord("job", job_id)
+        token = _current.set(record)
+        try:
+            with record.profile_thread():
+                return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+            record.finish()
+            profiler.add(record)
+    return wrapper
@@ -1,13 +1,18 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from . import models, crud
+from . import models, crud, idempotency
+from .profiling import profiled_job
 from .db import SessionLocal
-from .email_service import send_reminder_email
+from .email_service import send_reminder_emails
 from .whatsapp_service import trigger_whatsapp_message
 
 scheduler = BackgroundScheduler()
 
+# Reminders are sent and committed this many leads at a time, so a failure or
+# restart mid-run can only re-send reminders for the leads of one chunk
+REMINDER_CHUNK_SIZE = 50
+
 def check_for_reminders():
     """
     Scheduler job that checks for leads needing a 3-day reminder.
@@ -27,25 +32,29 @@ def check_for_reminders():
         
         print(f"Found {len(leads_to_remind)} leads requiring a reminder.")
         
-        for lead in leads_to_remind:
-            print(f"Processing reminder for Lead ID: {lead.id}, Name: {lead.name}")
-            
-            # 1. Send Reminder Email
-            email_success = send_reminder_email(lead)
-            
-            # 2. Trigger WhatsApp Reminder
-            whatsapp_success = trigger_whatsapp_message(lead, "REMINDER")
-            
-            # 3. Update DB
-            lead.status = models.LeadStatus.REMINDER_SENT
-            lead.reminder_sent_at = datetime.utcnow()
-            lead.last_touch_at = datetime.utcnow()
+        for start in range(0, len(leads_to_remind), REMINDER_CHUNK_SIZE):
+            chunk = leads_to_remind[start:start + REMINDER_CHUNK_SIZE]
             
-            # 4. Log messages
-            crud.log_message(db, lead.id, "EMAIL", "REMINDER", email_success, "Reminder email sent successfully" if email_success else "Reminder email failed")
-            crud.log_message(db, lead.id, "WHATSAPP", "REMINDER", whatsapp_success, "Reminder WhatsApp triggered successfully" if whatsapp_success else "Reminder WhatsApp trigger failed")
+            # 1. Send Reminder Emails (one batch across the SMTP pool)
+            email_results = send_reminder_emails(chunk)
             
-            db.commit()
+            for lead, email_result in zip(chunk, email_results):
+                print(f"Processing reminder for Lead ID: {lead.id}, Name: {lead.name}")
+                email_success = email_result.success
+                
+                # 2. Trigger WhatsApp Reminder
+                whatsapp_success = trigger_whatsapp_message(lead, "REMINDER")
+                
+                # 3. Update DB
+                lead.status = models.LeadStatus.REMINDER_SENT
+                lead.reminder_sent_at = datetime.utcnow()
+                lead.last_touch_at = datetime.utcnow()
+                
+                # 4. Log messages
+                crud.log_message(db, lead.id, "EMAIL", "REMINDER", email_success, email_result.provider_response, email_result.message_id)
+                crud.log_message(db, lead.id, "WHATSAPP", "REMINDER", whatsapp_success, "Reminder WhatsApp triggered successfully" if whatsapp_success else "Reminder WhatsApp trigger failed")
+                
+                db.commit()
             
     except Exception as e:
         print(f"An error occurred during the reminder check: {e}")
@@ -54,11 +63,26 @@ def check_for_reminders():
         db.close()
         print("Reminder check job finished.")
 
+def purge_idempotency_keys():
+    """
+    Scheduler job that deletes idempotency keys older than the configured TTL.
+    """
+    db: Session = SessionLocal()
+    try:
+        deleted = idempotency.purge_expired(db)
+        print(f"Purged {deleted} expired idempotency keys.")
+    except Exception as e:
+        print(f"An error occurred while purging idempotency keys: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 def start_scheduler():
     """Starts the background scheduler."""
     if not scheduler.running:
         # Schedule the job to run every hour
-        scheduler.add_job(check_for_reminders, 'interval', hours=1, id='reminder_check_job')
+        scheduler.add_job(profiled_job('reminder_check_job', check_for_reminders), 'interval', hours=1, id='reminder_check_job')
+        scheduler.add_job(profiled_job('idempotency_purge_job', purge_idempotency_keys), 'interval', hours=1, id='idempotency_purge_job')
         scheduler.start()
         print("APScheduler started and job scheduled to run every hour.")
 
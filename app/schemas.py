@@ -35,6 +35,28 @@ class Lead(LeadBase):
         orm_mode = True
         use_enum_values = True
 
+class LeadFields(BaseModel):
+    """A lead with only the columns requested through `GET /api/leads?fields=...`."""
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    source: Optional[str] = None
+    message: Optional[str] = None
+    status: Optional[LeadStatus] = None
+    created_at: Optional[datetime] = None
+    first_contact_at: Optional[datetime] = None
+    email_thread_id: Optional[str] = None
+    email_sent_at: Optional[datetime] = None
+    whatsapp_sent_at: Optional[datetime] = None
+    replied_at: Optional[datetime] = None
+    reminder_sent_at: Optional[datetime] = None
+    last_touch_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+    class Config:
+        use_enum_values = True
+
 # --- MessageLog Schemas ---
 
 class MessageLogBase(BaseModel):
@@ -42,6 +64,7 @@ class MessageLogBase(BaseModel):
     channel: MessageChannel
     kind: MessageKind
     provider_response: Optional[str] = None
+    provider_message_id: Optional[str] = None
     success: bool
 
 class MessageLogCreate(MessageLogBase):
@@ -61,3 +84,10 @@ class WhatsAppStatusUpdate(BaseModel):
     lead_id: int
     message_id: str
     status: str # e.g., "delivered", "read", "failed"
+
+# --- Admin Schemas ---
+
+class ProfilingUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = None
+    buffer_size: Optional[int] = None
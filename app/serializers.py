@@ -0,0 +1,38 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serializes to JSON bytes with orjson, falling back to the standard library."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def iter_json_array(keys: Sequence[str], rows: Sequence[tuple], chunk_size: int = 500) -> Iterator[bytes]:
+    """
+    Yields a JSON array of objects built from `rows` (tuples in `keys` order),
+    encoding `chunk_size` rows at a time so large responses stream out.
+    """
+    yield b"["
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        encoded = dumps([dict(zip(keys, row)) for row in chunk])
+        # Strip the brackets of each chunk and join the chunks with commas
+        yield (b"," if start else b"") + encoded[1:-1]
+    yield b"]"
@@ -0,0 +1,336 @@
+import base64
+import re
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email import policy
+from email.message import EmailMessage
+from email.utils import parseaddr
+from queue import LifoQueue, Empty
+from typing import Callable, NamedTuple
+
+import requests
+
+from . import config
+
+
+class EmailResult(NamedTuple):
+    success: bool
+    message_id: str | None = None
+    provider_response: str | None = None
+
+
+class OAuthTokenCache:
+    """
+    Caches a Gmail OAuth2 access token and refreshes it shortly before it expires.
+    Safe to share across threads; only one thread refreshes at a time.
+    """
+
+    # Refresh this many seconds before the provider's stated expiry
+    EXPIRY_MARGIN = 60
+
+    def __init__(self, client_id: str, client_secret: str, refresh_token: str, token_uri: str):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.token_uri = token_uri
+        self._lock = threading.Lock()
+        self._access_token: str | None = None
+        self._expires_at = 0.0
+
+    def get_token(self) -> tuple[str, float]:
+        """Returns (access_token, expires_at) with expires_at on the time.monotonic() clock."""
+        with self._lock:
+            if self._access_token is None or time.monotonic() >= self._expires_at:
+                self._refresh()
+            return self._access_token, self._expires_at
+
+    def invalidate(self):
+        """Forces the next get_token() to refresh, e.g. after the server rejects the token."""
+        with self._lock:
+            self._access_token = None
+
+    def _refresh(self):
+        response = requests.post(
+            self.token_uri,
+            data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "refresh_token": self.refresh_token,
+                "grant_type": "refresh_token",
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        self._access_token = payload["access_token"]
+        lifetime = int(payload.get("expires_in", 3600))
+        self._expires_at = time.monotonic() + max(lifetime - self.EXPIRY_MARGIN, 0)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP, auth_expires_at: float | None):
+        self.smtp = smtp
+        self.auth_expires_at = auth_expires_at
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """
+    A bounded pool of persistent, authenticated SMTP connections.
+
+    Connections are opened lazily, reused across messages and recycled when
+    their OAuth token expires, after `max_messages_per_connection` messages,
+    or when a liveness check fails after sitting idle.
+    """
+
+    # Idle connections are checked with NOOP before reuse
+    IDLE_CHECK_SECONDS = 30
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int = 4,
+        use_tls: bool = True,
+        username: str | None = None,
+        password: str | None = None,
+        token_cache: OAuthTokenCache | None = None,
+        max_messages_per_connection: int = 100,
+        timeout: float = 30,
+        smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+    ):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.token_cache = token_cache
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory
+
+        self._idle: LifoQueue[_PooledConnection] = LifoQueue()
+        # Limits open connections (idle + checked out) to `size`
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp-pool")
+        self._closed = False
+
+    # --- Connection management ---
+
+    def _connect(self) -> _PooledConnection:
+        smtp = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.use_tls:
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+
+        auth_expires_at = None
+        if self.token_cache is not None:
+            token, auth_expires_at = self.token_cache.get_token()
+            auth_string = f"user={self.username}\x01auth=Bearer {token}\x01\x01"
+            code, response = smtp.docmd("AUTH", "XOAUTH2 " + base64.b64encode(auth_string.encode()).decode())
+            if code == 334:
+                # The server sent an error challenge; an empty reply fetches the final status
+                code, response = smtp.docmd("")
+            if code != 235:
+                self.token_cache.invalidate()
+                smtp.close()
+                raise smtplib.SMTPAuthenticationError(code, response)
+        elif self.username and self.password:
+            smtp.login(self.username, self.password)
+
+        return _PooledConnection(smtp, auth_expires_at)
+
+    def _is_usable(self, conn: _PooledConnection) -> bool:
+        if conn.messages_sent >= self.max_messages_per_connection:
+            return False
+        if conn.auth_expires_at is not None and time.monotonic() >= conn.auth_expires_at:
+            return False
+        if time.monotonic() - conn.last_used > self.IDLE_CHECK_SECONDS:
+            try:
+                return conn.smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    @contextmanager
+    def connection(self):
+        """Checks out a live connection, opening a new one if none is idle."""
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+        self._slots.acquire()
+        conn = None
+        try:
+            while conn is None:
+                try:
+                    conn = self._idle.get_nowait()
+                except Empty:
+                    conn = self._connect()
+                    break
+                if not self._is_usable(conn):
+                    conn.close()
+                    conn = None
+            yield conn
+        except BaseException:
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self):
+        """Closes all idle connections and stops accepting work."""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+    # --- Sending ---
+
+    @staticmethod
+    def _submit(conn: _PooledConnection, message: EmailMessage) -> EmailResult:
+        """
+        Sends one message on an open connection, returning the server's DATA reply.
+        When the server advertises PIPELINING (RFC 2920), MAIL, RCPT and DATA go
+        out in a single write instead of three round trips.
+        """
+        smtp = conn.smtp
+        sender = parseaddr(message["From"])[1]
+        recipient = parseaddr(message["To"])[1]
+        payload = message.as_bytes(policy=policy.SMTP)
+
+        if smtp.has_extn("pipelining"):
+            smtp.send(f"MAIL FROM:{smtplib.quoteaddr(sender)}\r\nRCPT TO:{smtplib.quoteaddr(recipient)}\r\nDATA\r\n")
+            mail_reply, rcpt_reply, data_reply = smtp.getreply(), smtp.getreply(), smtp.getreply()
+        else:
+            mail_reply = smtp.mail(sender)
+            rcpt_reply = smtp.rcpt(recipient) if mail_reply[0] == 250 else (503, b"Skipped")
+            data_reply = smtp.docmd("DATA") if rcpt_reply[0] in (250, 251) else (503, b"Skipped")
+
+        if data_reply[0] == 354 and (mail_reply[0] != 250 or rcpt_reply[0] not in (250, 251)):
+            # Should not happen for a single recipient, but never leave the server mid-DATA
+            smtp.send(b".\r\n")
+            smtp.getreply()
+        if mail_reply[0] != 250:
+            smtp.rset()
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], sender)
+        if rcpt_reply[0] not in (250, 251):
+            smtp.rset()
+            raise smtplib.SMTPRecipientsRefused({recipient: rcpt_reply})
+        if data_reply[0] != 354:
+            smtp.rset()
+            raise smtplib.SMTPDataError(*data_reply)
+
+        # Dot-stuff and terminate the body as smtplib.SMTP.data() does
+        body = re.sub(rb"(?m)^\.", b"..", payload)
+        if not body.endswith(b"\r\n"):
+            body += b"\r\n"
+        smtp.send(body + b".\r\n")
+        code, response = smtp.getreply()
+        conn.messages_sent += 1
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+        return EmailResult(True, message["Message-ID"], response.decode(errors="replace"))
+
+    def _send_chunk(self, messages: list[EmailMessage]) -> list[EmailResult]:
+        """Sends messages back-to-back over as few connections as possible."""
+        results = []
+        pending = list(messages)
+        failures = 0
+        while pending:
+            try:
+                with self.connection() as conn:
+                    while pending and conn.messages_sent < self.max_messages_per_connection:
+                        try:
+                            results.append(self._submit(conn, pending[0]))
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            # Rejected message; the connection itself is still good
+                            results.append(EmailResult(False, pending[0]["Message-ID"], str(e)))
+                        pending.pop(0)
+                        failures = 0
+            except (smtplib.SMTPException, OSError) as e:
+                # Connection-level failure: retry once on a fresh connection, then give up on the rest
+                failures += 1
+                if failures > 1:
+                    print(f"ERROR: SMTP connection to {self.host}:{self.port} failed. Error: {e}")
+                    results.extend(EmailResult(False, message["Message-ID"], str(e)) for message in pending)
+                    break
+        return results
+
+    def send(self, message: EmailMessage) -> EmailResult:
+        """Sends a single message on a pooled connection."""
+        return self._send_chunk([message])[0]
+
+    def send_batch(self, messages: list[EmailMessage]) -> list[EmailResult]:
+        """
+        Sends messages concurrently across the pool. Each worker streams its share
+        over one persistent connection. Results are returned in input order.
+        """
+        if not messages:
+            return []
+        workers = min(self.size, len(messages))
+        chunks = [messages[i::workers] for i in range(workers)]
+        chunk_results = list(self._executor.map(self._send_chunk, chunks))
+        results: list[EmailResult] = [None] * len(messages)
+        for worker, chunk_result in enumerate(chunk_results):
+            results[worker::workers] = chunk_result
+        return results
+
+
+_pool: SMTPConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Returns the process-wide SMTP pool, creating it from settings on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = config.settings
+            token_cache = None
+            if settings.GMAIL_CLIENT_ID and settings.GMAIL_REFRESH_TOKEN:
+                token_cache = OAuthTokenCache(
+                    settings.GMAIL_CLIENT_ID,
+                    settings.GMAIL_CLIENT_SECRET,
+                    settings.GMAIL_REFRESH_TOKEN,
+                    settings.GMAIL_TOKEN_URI,
+                )
+            _pool = SMTPConnectionPool(
+                settings.SMTP_HOST,
+                settings.SMTP_PORT,
+                size=settings.SMTP_POOL_SIZE,
+                use_tls=settings.SMTP_USE_TLS,
+                username=settings.SMTP_USERNAME or settings.FROM_EMAIL,
+                password=settings.SMTP_PASSWORD,
+                token_cache=token_cache,
+                max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            )
+        return _pool
+
+
+def close_smtp_pool():
+    """Closes the process-wide SMTP pool, if one was created."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
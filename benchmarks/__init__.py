@@ -0,0 +1,7 @@
+"""
+Synthetic load generation and end-to-end benchmarks for KHWAISH.
+
+- generate.py: bulk-loads synthetic leads and message logs.
+- webhook_server.py: local stand-in for the Make/Zapier WhatsApp webhook.
+- run.py: runs the benchmark suite and reports JSON results.
+"""
@@ -0,0 +1,188 @@
+import sys
+import os
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add the parent directory to the path to allow importing app and benchmark modules
+sys.path.insert(0, REPO_ROOT)
+
+import requests
+
+from benchmarks.run import _free_port, _git_commit, _log, run_http_benchmark
+from benchmarks.webhook_server import running_webhook_server
+
+
+class IngestFlood:
+    """Keeps `clients` threads POSTing new leads to /api/leads until stopped."""
+
+    def __init__(self, base_url: str, clients: int, max_backoff: float):
+        self.base_url = base_url
+        self.clients = clients
+        self.max_backoff = max_backoff
+        self.statuses: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._batch = uuid.uuid4().hex[:8]
+        self._counter = itertools.count()
+
+    def _record(self, status: str):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def _run(self):
+        session = requests.Session()
+        while not self._stop.is_set():
+            n = next(self._counter)
+            payload = {"name": f"Flood {n}", "email": f"flood-{self._batch}-{n}@example.com", "source": "load_test"}
+            try:
+                response = session.post(f"{self.base_url}/api/leads", json=payload, timeout=60)
+                self._record(str(response.status_code))
+                if response.status_code in (429, 503):
+                    # Honour Retry-After, capped so the flood stays saturating
+                    time.sleep(min(float(response.headers.get("Retry-After", 1)), self.max_backoff))
+            except requests.exceptions.RequestException as e:
+                self._record(type(e).__name__)
+
+    def start(self):
+        self._started = time.perf_counter()
+        for _ in range(self.clients):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> dict:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=65)
+        elapsed = time.perf_counter() - self._started
+        accepted = self.statuses.get("200", 0)
+        return {
+            "clients": self.clients,
+            "seconds": round(elapsed, 3),
+            "responses": dict(sorted(self.statuses.items())),
+            "accepted_per_second": round(accepted / elapsed, 2) if elapsed > 0 else None,
+        }
+
+
+def _start_server_process(port: int, env: dict) -> subprocess.Popen:
+    """Runs the app in its own process so the load generator doesn't compete with it for the GIL."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("App server exited during startup")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/kpis", timeout=1)
+            return proc
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("App server failed to start")
+
+
+def run_load_test(args) -> dict:
+    from sqlalchemy import create_engine
+    from benchmarks.generate import generate
+
+    _log(f"Loading {args.leads} leads...")
+    generate(create_engine(args.database_url), args.leads, args.leads * 3, seed=args.seed)
+
+    with running_webhook_server(latency=args.webhook_latency) as webhook:
+        admin_token = uuid.uuid4().hex
+        env = dict(
+            os.environ,
+            DATABASE_URL=args.database_url,
+            MAKE_ZAPIER_WEBHOOK_URL=webhook.url,
+            ADMISSION_ENABLED="false" if args.no_admission else "true",
+            ADMIN_TOKEN=admin_token,
+        )
+        port = _free_port()
+        proc = _start_server_process(port, env)
+        base_url = f"http://127.0.0.1:{port}"
+
+        def interactive(s, i):
+            # Dashboard views mixed with the reply links clicked from emails
+            if i % 2:
+                return s.post(f"{base_url}/api/leads/{1 + i % args.leads}/mark-replied", timeout=60)
+            return s.get(f"{base_url}/", timeout=60)
+
+        try:
+            _log("Measuring interactive latency with no ingest load...")
+            idle = run_http_benchmark("interactive_idle", interactive, args.requests, args.concurrency, warmup=args.concurrency)
+
+            _log(f"Saturating ingest with {args.ingest_clients} clients (webhook latency {args.webhook_latency}s)...")
+            flood = IngestFlood(base_url, args.ingest_clients, args.max_backoff)
+            flood.start()
+            time.sleep(args.ramp_seconds)
+            _log("Measuring interactive latency under ingest saturation...")
+            saturated = run_http_benchmark("interactive_saturated", interactive, args.requests, args.concurrency)
+            admission_stats = requests.get(f"{base_url}/admin/admission", headers={"X-Admin-Token": admin_token}, timeout=10).json()
+            ingest = flood.stop()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    p99_idle = idle["latency_ms"]["p99"]
+    p99_saturated = saturated["latency_ms"]["p99"]
+    return {
+        "suite": "khwaish-admission",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "admission_enabled": not args.no_admission,
+        "config": vars(args),
+        "results": [idle, saturated],
+        "interactive_p99_ratio": round(p99_saturated / p99_idle, 2) if p99_idle else None,
+        "ingest": ingest,
+        "admission": admission_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test: interactive latency while POST /api/leads is saturated."
+    )
+    parser.add_argument("--leads", type=int, default=20_000, help="Leads to preload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=300, help="Interactive requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent interactive clients")
+    parser.add_argument("--ingest-clients", type=int, default=80, help="Concurrent clients flooding /api/leads")
+    parser.add_argument("--webhook-latency", type=float, default=0.5, help="Webhook latency holding each ingest request")
+    parser.add_argument("--max-backoff", type=float, default=1.0, help="Cap on Retry-After backoff for flood clients")
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="Wait after starting the flood before measuring")
+    parser.add_argument("--no-admission", action="store_true", help="Run with admission control disabled, for comparison")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.database_url = f"sqlite:///{os.path.join(tmp, 'admission.db')}"
+        report = run_load_test(args)
+
+    _log(f"Interactive p99: idle {report['results'][0]['latency_ms']['p99']}ms, "
+         f"saturated {report['results'][1]['latency_ms']['p99']}ms (ratio {report['interactive_p99_ratio']})")
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        _log(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
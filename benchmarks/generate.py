@@ -0,0 +1,202 @@
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from app import models
+from app.config import settings
+
+# Weighted distributions roughly matching a live funnel
+STATUS_WEIGHTS = {
+    models.LeadStatus.NEW: 5,
+    models.LeadStatus.CONTACTED: 20,
+    models.LeadStatus.REPLIED: 15,
+    models.LeadStatus.REMINDER_SENT: 30,
+    models.LeadStatus.IN_PROGRESS: 10,
+    models.LeadStatus.WON: 8,
+    models.LeadStatus.LOST: 12,
+}
+
+SOURCE_WEIGHTS = {
+    "website": 40,
+    "facebook": 25,
+    "instagram": 12,
+    "referral": 10,
+    "google_ads": 10,
+    "csv_import": 3,
+}
+
+FIRST_NAMES = ["Aarav", "Alice", "Bob", "Chen", "Diana", "Ethan", "Fatima", "George", "Hannah", "Ishaan", "Jane", "Kavya", "Liam", "Maya", "Noah", "Olivia", "Priya", "Rohan", "Sara", "Vikram"]
+LAST_NAMES = ["Brown", "Doe", "Gupta", "Johnson", "Khan", "Lee", "Mehta", "Nair", "Patel", "Rao", "Sharma", "Smith", "Singh", "Wang", "Williams"]
+
+# Leads are spread over this many days, biased towards recent activity
+HISTORY_DAYS = 180
+CHUNK_SIZE = 20000
+
+
+def _random_created_at(rng: random.Random, now: datetime) -> datetime:
+    # Exponential age gives many recent leads and a long tail of old ones
+    age_days = min(rng.expovariate(1 / 30), HISTORY_DAYS)
+    return now - timedelta(days=age_days, seconds=rng.randint(0, 86399))
+
+
+def _lead_row(rng: random.Random, lead_id: int, status: models.LeadStatus, source: str, now: datetime) -> dict:
+    created_at = _random_created_at(rng, now)
+    row = {
+        "id": lead_id,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "email": f"lead{lead_id}@example.com",
+        "phone": f"{rng.randint(600, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "source": source,
+        "message": "Synthetic lead",
+        "status": status,
+        "created_at": created_at,
+        "first_contact_at": None,
+        "email_sent_at": None,
+        "whatsapp_sent_at": None,
+        "replied_at": None,
+        "reminder_sent_at": None,
+        "last_touch_at": created_at,
+    }
+    if status == models.LeadStatus.NEW:
+        return row
+
+    first_contact_at = created_at + timedelta(seconds=rng.randint(1, 120))
+    if status == models.LeadStatus.CONTACTED:
+        # The hourly reminder job keeps the backlog of overdue CONTACTED leads small,
+        # so most CONTACTED leads were first contacted within the last 3 days.
+        first_contact_at = now - timedelta(seconds=rng.randint(60, 3 * 86400 - 60))
+        row["created_at"] = first_contact_at - timedelta(seconds=rng.randint(1, 120))
+    row["first_contact_at"] = first_contact_at
+    row["email_sent_at"] = first_contact_at
+    row["whatsapp_sent_at"] = first_contact_at if rng.random() < 0.85 else None
+    row["last_touch_at"] = first_contact_at
+
+    if status in (models.LeadStatus.REMINDER_SENT, models.LeadStatus.LOST):
+        row["reminder_sent_at"] = first_contact_at + timedelta(days=3, hours=rng.randint(0, 1))
+        row["last_touch_at"] = row["reminder_sent_at"]
+    if status in (models.LeadStatus.REPLIED, models.LeadStatus.IN_PROGRESS, models.LeadStatus.WON):
+        row["replied_at"] = first_contact_at + timedelta(hours=rng.randint(1, 96))
+        row["last_touch_at"] = row["replied_at"]
+    return row
+
+
+def _message_rows(rng: random.Random, lead: dict) -> list[dict]:
+    """Returns the FIRST_TOUCH/REMINDER log entries implied by a lead's timestamps."""
+    rows = []
+    for kind, sent_at in ((models.MessageKind.FIRST_TOUCH, lead["first_contact_at"]), (models.MessageKind.REMINDER, lead["reminder_sent_at"])):
+        if sent_at is None:
+            continue
+        for channel in (models.MessageChannel.EMAIL, models.MessageChannel.WHATSAPP):
+            success = rng.random() < 0.97
+            rows.append({
+                "lead_id": lead["id"],
+                "channel": channel,
+                "kind": kind,
+                "sent_at": sent_at,
+                "provider_response": "Synthetic send" if success else "Synthetic failure",
+                "success": success,
+            })
+    return rows
+
+
+def _manual_message_row(rng: random.Random, lead_id: int, now: datetime) -> dict:
+    success = rng.random() < 0.97
+    return {
+        "lead_id": lead_id,
+        "channel": rng.choice((models.MessageChannel.EMAIL, models.MessageChannel.WHATSAPP)),
+        "kind": models.MessageKind.MANUAL,
+        "sent_at": _random_created_at(rng, now),
+        "provider_response": "Synthetic send" if success else "Synthetic failure",
+        "success": success,
+    }
+
+
+def generate(engine, n_leads: int, n_messages: int, seed: int = 42) -> dict:
+    """
+    Bulk-loads synthetic leads and message logs into the database behind `engine`.
+
+    Message logs follow each lead's timeline (first touch and reminder on both
+    channels); any remainder up to `n_messages` is filled with MANUAL messages
+    attached to random leads. Returns load statistics.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(STATUS_WEIGHTS.values())
+    sources = list(SOURCE_WEIGHTS)
+    source_weights = list(SOURCE_WEIGHTS.values())
+
+    models.Base.metadata.create_all(bind=engine)
+    leads_table = models.Lead.__table__
+    logs_table = models.MessageLog.__table__
+
+    start = time.perf_counter()
+    leads_written = 0
+    messages_written = 0
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Durability is irrelevant for a throwaway load; trade it for speed
+            conn.execute(text("PRAGMA synchronous=OFF"))
+            conn.execute(text("PRAGMA journal_mode=MEMORY"))
+
+        first_id = (conn.execute(select(func.max(leads_table.c.id))).scalar() or 0) + 1
+        last_id = first_id + n_leads - 1
+        # Leave room for the MANUAL filler by capping timeline messages per chunk
+        timeline_share = n_messages / max(n_leads, 1)
+
+        for chunk_start in range(first_id, last_id + 1, CHUNK_SIZE):
+            chunk_end = min(chunk_start + CHUNK_SIZE, last_id + 1)
+            lead_rows = []
+            message_rows = []
+            for lead_id in range(chunk_start, chunk_end):
+                status = rng.choices(statuses, status_weights)[0]
+                source = rng.choices(sources, source_weights)[0]
+                lead = _lead_row(rng, lead_id, status, source, now)
+                lead_rows.append(lead)
+                if messages_written + len(message_rows) < (lead_id - first_id + 1) * timeline_share:
+                    message_rows.extend(_message_rows(rng, lead))
+
+            conn.execute(insert(leads_table), lead_rows)
+            leads_written += len(lead_rows)
+            if message_rows:
+                conn.execute(insert(logs_table), message_rows)
+                messages_written += len(message_rows)
+
+        while messages_written < n_messages and n_leads > 0:
+            batch = min(CHUNK_SIZE * 2, n_messages - messages_written)
+            conn.execute(insert(logs_table), [_manual_message_row(rng, rng.randint(first_id, last_id), now) for _ in range(batch)])
+            messages_written += batch
+
+    elapsed = time.perf_counter() - start
+    return {
+        "leads": leads_written,
+        "messages": messages_written,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round((leads_written + messages_written) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic leads and message logs.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--messages", type=int, default=5_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    print(f"Generating {args.leads} leads and {args.messages} message logs into {args.database_url}...")
+    stats = generate(engine, args.leads, args.messages, seed=args.seed)
+    print(f"Done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import sys
+import os
+import argparse
+import contextlib
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add the parent directory to the path to allow importing app and benchmark modules
+sys.path.insert(0, REPO_ROOT)
+
+import requests
+
+from benchmarks.smtp_server import running_smtp_server
+from benchmarks.webhook_server import running_webhook_server
+
+ALL_BENCHMARKS = ["list_leads", "list_leads_projection", "kpis", "dashboard", "import_csv", "check_for_reminders", "send_emails"]
+
+
+def _log(message: str):
+    # stdout is reserved for the JSON report (and silenced while benchmarks run)
+    print(message, file=sys.stderr, flush=True)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(name: str, latencies: list[float], elapsed: float, errors: int = 0, **extra) -> dict:
+    """Builds the machine-readable result for one benchmark. Latencies are in seconds."""
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3)
+    result = {
+        "name": name,
+        "operations": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_ops": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "min": ms(ordered[0]) if ordered else 0.0,
+            "mean": ms(statistics.fmean(ordered)) if ordered else 0.0,
+            "p50": ms(_percentile(ordered, 50)),
+            "p90": ms(_percentile(ordered, 90)),
+            "p95": ms(_percentile(ordered, 95)),
+            "p99": ms(_percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+    result.update(extra)
+    return result
+
+
+def run_http_benchmark(name: str, send, n_requests: int, concurrency: int, warmup: int = 0, **extra) -> dict:
+    """
+    Calls `send(session, i)` n_requests times across `concurrency` threads.
+    `send` returns a requests.Response; non-2xx responses count as errors.
+    """
+    local = threading.local()
+
+    def _session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    for i in range(warmup):
+        try:
+            send(_session(), -1 - i)
+        except requests.exceptions.RequestException:
+            pass
+
+    def _timed(i: int):
+        start = time.perf_counter()
+        try:
+            ok = send(_session(), i).ok
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(_timed, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in outcomes]
+    errors = sum(1 for _, ok in outcomes if not ok)
+    return summarize(name, latencies, elapsed, errors=errors, concurrency=concurrency, **extra)
+
+
+def _csv_payload(rows: int) -> bytes:
+    batch = uuid.uuid4().hex[:12]
+    lines = ["name,email,phone,source,message"]
+    for i in range(rows):
+        lines.append(f"Bench User {i},bench-{batch}-{i}@example.com,555-000-{i % 10000:04d},csv_import,Benchmark import")
+    return "\n".join(lines).encode()
+
+
+def bench_check_for_reminders(runs: int, batch: int) -> dict:
+    """Times `check_for_reminders` over `runs` passes, each with `batch` overdue leads."""
+    from sqlalchemy import func, select, update
+    from app import models
+    from app.db import engine
+    from app.scheduler import check_for_reminders
+
+    leads = models.Lead.__table__
+    overdue = datetime.utcnow() - timedelta(days=4)
+    with engine.connect() as conn:
+        ids = conn.execute(
+            select(leads.c.id).where(leads.c.status == models.LeadStatus.REMINDER_SENT).limit(batch)
+        ).scalars().all()
+
+    latencies = []
+    processed = 0
+    for _ in range(runs):
+        # Put a fixed batch back into the "contacted 4 days ago, no reply" state (untimed)
+        with engine.begin() as conn:
+            conn.execute(
+                update(leads)
+                .where(leads.c.id.in_(ids))
+                .values(status=models.LeadStatus.CONTACTED, replied_at=None, first_contact_at=overdue)
+            )
+            processed += conn.execute(
+                select(func.count()).select_from(leads).where(
+                    leads.c.status == models.LeadStatus.CONTACTED,
+                    leads.c.replied_at.is_(None),
+                    leads.c.first_contact_at <= datetime.utcnow() - timedelta(days=3),
+                )
+            ).scalar()
+
+        start = time.perf_counter()
+        check_for_reminders()
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(latencies)
+    return summarize(
+        "check_for_reminders",
+        latencies,
+        total,
+        leads_processed=processed,
+        leads_per_second=round(processed / total, 1) if total > 0 else None,
+    )
+
+
+def bench_send_emails(count: int, smtp_host: str, smtp_port: int) -> list[dict]:
+    """Compares a fresh connection per email against batch submission over the pool."""
+    from app.email_service import _build_message
+    from app.smtp_sender import SMTPConnectionPool, get_smtp_pool
+
+    messages = [_build_message(f"bench-{i}@example.com", "Benchmark", "<p>Benchmark email</p>") for i in range(count)]
+
+    # Baseline: connect, authenticate and quit for every message
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        sent = time.perf_counter()
+        single = SMTPConnectionPool(smtp_host, smtp_port, size=1, use_tls=False, username="bench", password="bench")
+        single.send(message)
+        single.close()
+        latencies.append(time.perf_counter() - sent)
+    per_connection = summarize("send_emails_connection_per_message", latencies, time.perf_counter() - start)
+
+    pool = get_smtp_pool()
+    start = time.perf_counter()
+    results = pool.send_batch(messages)
+    elapsed = time.perf_counter() - start
+    # Individual latencies are not observable inside a batch; report the per-message average
+    pooled = summarize(
+        "send_emails_pooled_batch",
+        [elapsed / count] * count,
+        elapsed,
+        errors=sum(1 for result in results if not result.success),
+        pool_size=pool.size,
+    )
+    return [per_connection, pooled]
+
+
+def _start_app_server(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("App server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> dict:
+    # Templates and static files are resolved relative to the repo root
+    os.chdir(REPO_ROOT)
+
+    # The app and the mock services print on startup and on every send; keep that out of the report
+    with running_webhook_server(latency=args.webhook_latency) as webhook, \
+            running_smtp_server(latency=args.smtp_latency) as smtp, \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Settings are read at import time, so configure before importing the app
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["MAKE_ZAPIER_WEBHOOK_URL"] = webhook.url
+        os.environ["EMAIL_BACKEND"] = "smtp"
+        os.environ["SMTP_HOST"] = smtp.host
+        os.environ["SMTP_PORT"] = str(smtp.port)
+        os.environ["SMTP_USE_TLS"] = "false"
+        os.environ["SMTP_USERNAME"] = "bench"
+        os.environ["SMTP_PASSWORD"] = "bench"
+        # The stand-in does not speak OAuth; make sure a local .env cannot enable it
+        os.environ["GMAIL_REFRESH_TOKEN"] = ""
+
+        from app.crud import LEAD_FIELDS
+        from app.db import engine
+        from benchmarks.generate import generate
+
+        dataset = None
+        if not args.skip_generate:
+            _log(f"Loading {args.leads} leads / {args.messages} message logs into {args.database_url}...")
+            dataset = generate(engine, args.leads, args.messages, seed=args.seed)
+            _log(f"Loaded in {dataset['seconds']}s")
+
+        port = _free_port()
+        server, thread = _start_app_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+        statuses = ["CONTACTED", "REPLIED", "REMINDER_SENT", "WON"]
+
+        senders = {
+            "list_leads": lambda s, i: s.get(
+                f"{base_url}/api/leads",
+                params={"limit": args.page_size, "status": statuses[i % len(statuses)]} if i % 2 else {"limit": args.page_size},
+            ),
+            "kpis": lambda s, i: s.get(f"{base_url}/api/kpis"),
+            "dashboard": lambda s, i: s.get(f"{base_url}/"),
+            "import_csv": lambda s, i: s.post(
+                f"{base_url}/api/leads/import-csv",
+                files={"file": ("leads.csv", _csv_payload(args.csv_rows), "text/csv")},
+            ),
+        }
+
+        results = []
+        try:
+            for name in args.benchmarks:
+                _log(f"Running {name}...")
+                if name == "send_emails":
+                    for result in bench_send_emails(args.emails, smtp.host, smtp.port):
+                        results.append(result)
+                        _log(f"  {result['name']}: {result['throughput_ops']} ops/s")
+                    continue
+                if name == "list_leads_projection":
+                    # Current ORM + pydantic path vs. the column-projected, streamed path
+                    all_fields = ",".join(LEAD_FIELDS)
+                    variants = {
+                        "orm": {},
+                        "projected_all_fields": {"fields": all_fields},
+                        "projected_4_fields": {"fields": "id,name,email,status"},
+                    }
+                    for limit in args.projection_limits:
+                        for variant, params in variants.items():
+                            result = run_http_benchmark(
+                                f"list_leads_{variant}_{limit}",
+                                lambda s, i, params=params, limit=limit: s.get(f"{base_url}/api/leads", params={"limit": limit, **params}),
+                                args.projection_requests, args.concurrency, warmup=1,
+                                limit=limit,
+                            )
+                            results.append(result)
+                            _log(f"  {result['name']}: {result['throughput_ops']} ops/s, p50 {result['latency_ms']['p50']}ms")
+                    continue
+                if name == "check_for_reminders":
+                    result = bench_check_for_reminders(args.reminder_runs, args.reminder_batch)
+                elif name == "import_csv":
+                    result = run_http_benchmark(
+                        name, senders[name], args.csv_requests, args.concurrency,
+                        rows_per_request=args.csv_rows,
+                    )
+                    result["rows_per_second"] = round(result["throughput_ops"] * args.csv_rows, 1) if result["throughput_ops"] else None
+                else:
+                    result = run_http_benchmark(name, senders[name], args.requests, args.concurrency, warmup=args.warmup)
+                results.append(result)
+                _log(f"  {result['throughput_ops']} ops/s, p50 {result['latency_ms']['p50']}ms, p99 {result['latency_ms']['p99']}ms")
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+        return {
+            "suite": "khwaish",
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+            "dataset": dataset,
+            "webhook": webhook.stats.snapshot(),
+            "smtp": smtp.stats.snapshot(),
+            "results": results,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the KHWAISH end-to-end benchmark suite.")
+    parser.add_argument("--database-url", help="Database to benchmark (default: a fresh SQLite file in a temp dir)")
+    parser.add_argument("--skip-generate", action="store_true", help="Reuse the existing data in --database-url")
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--benchmarks", nargs="+", choices=ALL_BENCHMARKS, default=ALL_BENCHMARKS)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per HTTP benchmark")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100, help="`limit` used for /api/leads")
+    parser.add_argument("--projection-limits", type=int, nargs="+", default=[1000, 10000], help="`limit` values for list_leads_projection")
+    parser.add_argument("--projection-requests", type=int, default=20)
+    parser.add_argument("--csv-requests", type=int, default=10)
+    parser.add_argument("--csv-rows", type=int, default=50)
+    parser.add_argument("--reminder-runs", type=int, default=5)
+    parser.add_argument("--reminder-batch", type=int, default=200)
+    parser.add_argument("--emails", type=int, default=500, help="Messages per send_emails run")
+    parser.add_argument("--webhook-latency", type=float, default=0.0, help="Artificial webhook latency in seconds")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="Artificial per-message SMTP latency in seconds")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.database_url:
+            if args.skip_generate:
+                parser.error("--skip-generate requires --database-url")
+            args.database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        report = run_suite(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        _log(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
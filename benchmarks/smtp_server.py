@@ -0,0 +1,155 @@
+import base64
+import itertools
+import socket
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SMTPStats:
+    """Thread-safe counters for the stand-in SMTP server."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.auths = 0
+        self.messages = 0
+        self.rejected = 0
+
+    def incr(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"connections": self.connections, "auths": self.auths, "messages": self.messages, "rejected": self.rejected}
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Minimal SMTP dialogue: EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP,
+    QUIT. Commands are answered strictly in order, so pipelined clients work.
+    Recipients containing "reject" are refused. Any credentials are accepted,
+    except XOAUTH2 bearer tokens other than the server's `oauth_token` when set.
+    """
+
+    def setup(self):
+        super().setup()
+        # Replies are written line by line; don't let Nagle hold them back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.stats.incr("connections")
+        self._reply("220 localhost KHWAISH SMTP stand-in ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n" + (b"250-PIPELINING\r\n" if server.pipelining else b"") + b"250-8BITMIME\r\n250 AUTH PLAIN LOGIN XOAUTH2\r\n")
+            elif verb == "AUTH":
+                args = line.split(" ")
+                mechanism = args[1].upper() if len(args) > 1 else ""
+                if mechanism == "LOGIN":
+                    # Username and password prompts
+                    self._reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif mechanism == "XOAUTH2" and server.oauth_token is not None:
+                    auth_string = base64.b64decode(args[2]).decode(errors="replace") if len(args) > 2 else ""
+                    if f"auth=Bearer {server.oauth_token}\x01" not in auth_string:
+                        # Like Gmail: an error challenge, then the final status after the client's empty reply
+                        self._reply("334 " + base64.b64encode(b'{"status":"401","schemes":"bearer"}').decode())
+                        self.rfile.readline()
+                        self._reply("535 5.7.8 Username and Password not accepted")
+                        self.wfile.flush()
+                        continue
+                server.stats.incr("auths")
+                self._reply("235 2.7.0 Accepted")
+            elif verb == "MAIL":
+                self._reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                if "reject" in line.lower():
+                    server.stats.incr("rejected")
+                    self._reply("550 5.1.1 Recipient rejected")
+                else:
+                    self._reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self._reply("354 Go ahead")
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line == b".\r\n":
+                        break
+                if server.latency:
+                    time.sleep(server.latency)
+                server.stats.incr("messages")
+                self._reply(f"250 2.0.0 OK queued as {next(server.queue_ids):08X}")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 2.0.0 OK")
+            elif verb == "QUIT":
+                self._reply("221 2.0.0 Bye")
+                return
+            else:
+                self._reply("502 5.5.1 Unrecognized command")
+            self.wfile.flush()
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """Local stand-in for Gmail SMTP, for exercising `smtp_sender` offline (no TLS)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, pipelining: bool = True, oauth_token: str | None = None):
+        super().__init__((host, port), _SMTPHandler)
+        self.latency = latency
+        self.pipelining = pipelining
+        self.oauth_token = oauth_token
+        self.stats = SMTPStats()
+        self.queue_ids = itertools.count(1)
+
+    @property
+    def host(self) -> str:
+        return self.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+@contextmanager
+def running_smtp_server(**kwargs):
+    """Runs an SMTPServer in a background thread for the duration of the block."""
+    server = SMTPServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local SMTP stand-in.")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before accepting each message")
+    args = parser.parse_args()
+
+    server = SMTPServer(port=args.port, latency=args.latency)
+    print(f"SMTP stand-in listening on {server.host}:{server.port} (set SMTP_HOST/SMTP_PORT and SMTP_USE_TLS=false)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopping. Stats: {server.stats.snapshot()}")
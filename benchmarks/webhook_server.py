@@ -0,0 +1,105 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookStats:
+    """Thread-safe counters for requests received by the stand-in webhook."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.failed = 0
+        self.by_type = {}
+
+    def record(self, kind: str, failed: bool):
+        with self._lock:
+            self.received += 1
+            if failed:
+                self.failed += 1
+            self.by_type[kind] = self.by_type.get(kind, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"received": self.received, "failed": self.failed, "by_type": dict(self.by_type)}
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        try:
+            kind = json.loads(body).get("type", "UNKNOWN")
+        except ValueError:
+            kind = "INVALID"
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        failed = self.server.failure_rate > 0 and random.random() < self.server.failure_rate
+        self.server.stats.record(kind, failed)
+
+        payload = json.dumps({"accepted": not failed}).encode()
+        self.send_response(500 if failed else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Make/Zapier webhook used by `whatsapp_service`.
+
+    Accepts any POST, optionally after `latency` seconds, and fails a
+    `failure_rate` fraction of requests with HTTP 500.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, failure_rate: float = 0.0):
+        super().__init__((host, port), _WebhookHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.stats = WebhookStats()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+
+@contextmanager
+def running_webhook_server(**kwargs):
+    """Runs a WebhookServer in a background thread for the duration of the block."""
+    server = WebhookServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the WhatsApp webhook.")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before responding")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = WebhookServer(port=args.port, latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Webhook stand-in listening on {server.url} (set MAKE_ZAPIER_WEBHOOK_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopping. Stats: {server.stats.snapshot()}")
@@ -4,16 +4,41 @@ import os
 # Add the parent directory to the path to allow importing app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import inspect, text
+
 from app.db import engine, Base
 from app.config import load_config
 from app import models  # Ensure models are registered with Base
 
+# Columns added to existing tables after they were first created.
+# create_all() never alters existing tables, so these are added here.
+ADDED_COLUMNS = [
+    ("message_logs", "provider_message_id"),
+]
+
+def migrate_db():
+    """Adds any columns in ADDED_COLUMNS that an existing database is missing."""
+    inspector = inspect(engine)
+    for table_name, column_name in ADDED_COLUMNS:
+        table = Base.metadata.tables[table_name]
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        if column_name not in existing:
+            column_type = table.c[column_name].type.compile(dialect=engine.dialect)
+            print(f"Adding column {table_name}.{column_name}...")
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+        for index in table.indexes:
+            if column_name in index.columns:
+                index.create(bind=engine, checkfirst=True)
+
 def init_db():
     """Initializes the database by creating all tables defined in models.py."""
     load_config()
     print("Initializing database...")
     # This will create the tables if they don't exist
     Base.metadata.create_all(bind=engine)
+    # Bring tables created by earlier versions up to date
+    migrate_db()
     print("Database initialization complete. Tables created.")
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+
+# Point the app at throwaway databases before it is imported: a primary and a
+# second SQLite file standing in for a read replica
+_tmp_dir = tempfile.mkdtemp(prefix="khwaish-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'primary.db')}"
+os.environ["READ_REPLICA_URLS"] = f"sqlite:///{os.path.join(_tmp_dir, 'replica.db')}"
+os.environ["EMAIL_BACKEND"] = "mock"
+os.environ["MAKE_ZAPIER_WEBHOOK_URL"] = ""
+
+# Add the parent directory to the path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import idempotency, models
+from app.db import Base, SessionLocal, engine, read_engines
+from app.main import app
+
+ReplicaSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engines[0])
+
+
+@pytest.fixture(autouse=True)
+def reset_databases():
+    """Gives every test empty tables on the primary and the replica."""
+    for bind in (engine, read_engines[0]):
+        Base.metadata.drop_all(bind=bind)
+        Base.metadata.create_all(bind=bind)
+    idempotency.cache.clear()
+    yield
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so the startup event (scheduler) does not run
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def replica_db():
+    session = ReplicaSession()
+    yield session
+    session.close()
+
+
+def add_lead(session, **overrides) -> models.Lead:
+    values = {"name": "Test Lead", "email": "lead@example.com", "source": "test", "status": models.LeadStatus.NEW}
+    values.update(overrides)
+    lead = models.Lead(**values)
+    session.add(lead)
+    session.commit()
+    session.refresh(lead)
+    return lead
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app import admission, config
+
+
+def _scope(method: str, path: str) -> dict:
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+async def _call(app, scope) -> dict:
+    """Runs one request through an ASGI app and returns its status and headers."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return {"status": start["status"], "headers": dict(start.get("headers", []))}
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _full_limiters(queue_size: int = 0, queue_timeout: float = 1.0) -> dict:
+    """Limiters of size 1 for every class, each already holding its one slot."""
+    limiters = {name: admission.AdmissionLimiter(name, 1, queue_size, queue_timeout) for name in admission.limiters}
+    for limiter in limiters.values():
+        asyncio.run(limiter.acquire())
+    return limiters
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/api/leads", admission.INGEST),
+    ("POST", "/api/leads/", admission.INGEST),
+    ("POST", "/api/leads/import-csv", admission.INGEST),
+    ("POST", "/api/leads/7/mark-replied", admission.INTERACTIVE),
+    ("GET", "/api/leads", admission.INTERACTIVE),
+    ("GET", "/", admission.INTERACTIVE),
+    ("POST", "/webhooks/whatsapp-status", admission.WEBHOOK),
+    ("GET", "/admin/admission", None),
+    ("GET", "/static/style.css", None),
+])
+def test_classify(method, path, expected):
+    assert admission.classify(method, path) == expected
+
+
+def test_full_queue_is_rejected_with_429_and_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "limiters", _full_limiters(queue_size=0))
+
+    response = asyncio.run(_call(admission.AdmissionMiddleware(_ok), _scope("POST", "/api/leads")))
+
+    assert response["status"] == 429
+    assert response["headers"][b"retry-after"] == str(config.settings.ADMISSION_RETRY_AFTER_SECONDS).encode()
+    assert admission.limiters[admission.INGEST].rejected_queue_full == 1
+
+
+def test_queue_wait_timeout_is_rejected_with_503_and_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "limiters", _full_limiters(queue_size=1, queue_timeout=0.05))
+
+    response = asyncio.run(_call(admission.AdmissionMiddleware(_ok), _scope("GET", "/api/leads")))
+
+    assert response["status"] == 503
+    assert b"retry-after" in response["headers"]
+    limiter = admission.limiters[admission.INTERACTIVE]
+    assert limiter.rejected_timeout == 1
+    assert limiter.waiting == 0
+
+
+def test_queued_request_is_admitted_when_a_slot_frees_up():
+    limiter = admission.AdmissionLimiter(admission.INGEST, 1, 1, 1.0)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        limiter.release()
+        await waiter
+
+    asyncio.run(scenario())
+
+    assert limiter.active == 1
+    assert limiter.admitted == 2
+
+
+@pytest.mark.parametrize("path", ["/admin/admission", "/static/style.css"])
+def test_admin_and_static_bypass_the_limits(monkeypatch, path):
+    monkeypatch.setattr(admission, "limiters", _full_limiters())
+
+    response = asyncio.run(_call(admission.AdmissionMiddleware(_ok), _scope("GET", path)))
+
+    assert response["status"] == 200
+
+
+def test_saturated_ingest_does_not_block_interactive_routes(client, monkeypatch):
+    limiters = dict(admission.limiters)
+    limiters[admission.INGEST] = _full_limiters()[admission.INGEST]
+    monkeypatch.setattr(admission, "limiters", limiters)
+
+    ingest = client.post("/api/leads", json={"name": "Asha", "email": "asha@example.com", "source": "web_form"})
+    dashboard = client.get("/")
+
+    assert ingest.status_code == 429
+    assert ingest.headers["Retry-After"] == str(config.settings.ADMISSION_RETRY_AFTER_SECONDS)
+    assert dashboard.status_code == 200
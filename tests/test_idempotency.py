@@ -0,0 +1,91 @@
+import pytest
+
+from app import crud, main, models
+
+LEAD = {"name": "Asha", "email": "asha@example.com", "source": "web_form"}
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    """Records the lead IDs first-contact emails are sent to."""
+    sent = []
+    send = main.send_first_contact_email
+
+    def recording_send(lead):
+        sent.append(lead.id)
+        return send(lead)
+
+    monkeypatch.setattr(main, "send_first_contact_email", recording_send)
+    return sent
+
+
+def test_retry_replays_the_stored_response(client, db, sent_emails):
+    first = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+    retry = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db.query(models.Lead).count() == 1
+    assert len(sent_emails) == 1
+
+
+def test_replay_is_served_from_the_table_after_a_cache_miss(client, sent_emails):
+    first = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+    main.idempotency.cache.clear()
+
+    retry = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(sent_emails) == 1
+
+
+def test_reused_key_with_a_different_body_is_rejected(client):
+    client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    response = client.post("/api/leads", json={**LEAD, "name": "Someone Else"}, headers={"Idempotency-Key": "key-1"})
+
+    assert response.status_code == 422
+
+
+def test_failure_before_outreach_releases_the_key(client, db, sent_emails):
+    client.post("/api/leads", json=LEAD)
+    sent_emails.clear()
+
+    # Duplicate email: creating the lead fails before anything is sent
+    response = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    assert response.status_code == 500
+    assert crud.get_idempotency_key(db, "key-1") is None
+    assert sent_emails == []
+
+
+def test_failure_after_outreach_is_replayed_not_resent(client, db, sent_emails, monkeypatch):
+    def failing_whatsapp(lead, kind):
+        raise RuntimeError("webhook client crashed")
+
+    trigger_whatsapp_message = main.trigger_whatsapp_message
+    monkeypatch.setattr(main, "trigger_whatsapp_message", failing_whatsapp)
+    first = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+    monkeypatch.setattr(main, "trigger_whatsapp_message", trigger_whatsapp_message)
+    main.idempotency.cache.clear()
+
+    retry = client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    assert first.status_code == 500
+    assert retry.status_code == 500
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(sent_emails) == 1
+    assert db.query(models.Lead).count() == 1
+
+
+def test_metrics_require_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main.config.settings, "ADMIN_TOKEN", "test-admin-token")
+    client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+    client.post("/api/leads", json=LEAD, headers={"Idempotency-Key": "key-1"})
+
+    assert client.get("/admin/idempotency").status_code == 403
+    metrics = client.get("/admin/idempotency", headers={"X-Admin-Token": "test-admin-token"}).json()
+    assert metrics["size"] == 1 and metrics["hits"] >= 1
+    assert client.get("/api/idempotency/metrics").status_code == 404
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from app import crud, main, models
+from app.db import SessionLocal
+from conftest import add_lead
+
+
+@pytest.fixture(autouse=True)
+def read_from_primary(monkeypatch):
+    monkeypatch.setattr(main, "get_read_sessionmaker", lambda: SessionLocal)
+
+
+@pytest.fixture
+def leads(db):
+    add_lead(db, name="Asha", email="asha@example.com", source="web_form", status=models.LeadStatus.CONTACTED,
+             created_at=datetime(2024, 5, 1, 9, 30, 15, 123456), first_contact_at=datetime(2024, 5, 1, 9, 31))
+    add_lead(db, name="Ravi", email="ravi@example.com", phone="555-0100", source="csv", status=models.LeadStatus.NEW,
+             created_at=datetime(2024, 5, 2, 14, 0))
+    add_lead(db, name="Meera", email="meera@example.com", source="web_form", status=models.LeadStatus.WON,
+             created_at=datetime(2024, 5, 3, 8, 15, 0, 500))
+
+
+def test_projected_rows_match_the_orm_path(client, leads):
+    fields = ["status", "id", "created_at", "first_contact_at", "phone"]
+
+    full = client.get("/api/leads").json()
+    projected = client.get(f"/api/leads?fields={','.join(fields)}")
+
+    assert projected.status_code == 200
+    assert len(full) == 3
+    assert projected.headers["content-type"] == "application/json"
+    assert projected.json() == [{field: lead[field] for field in fields} for lead in full]
+
+
+def test_projected_keys_follow_the_requested_order(client, leads):
+    response = client.get("/api/leads?fields=name,status,id&limit=1")
+
+    assert response.text == '[{"name":"Asha","status":"CONTACTED","id":1}]'
+
+
+def test_projected_enums_and_datetimes_are_encoded(client, leads):
+    rows = client.get("/api/leads?fields=status,created_at,first_contact_at&limit=1").json()
+
+    assert rows == [{"status": "CONTACTED", "created_at": "2024-05-01T09:30:15.123456", "first_contact_at": "2024-05-01T09:31:00"}]
+
+
+def test_projected_path_applies_filters(client, leads):
+    rows = client.get("/api/leads?fields=name&source=web_form&status=WON").json()
+
+    assert rows == [{"name": "Meera"}]
+
+
+@pytest.mark.parametrize("fields", ["id,password", ",", "name,,bogus"])
+def test_unknown_or_empty_fields_are_rejected(client, leads, fields):
+    response = client.get(f"/api/leads?fields={fields}")
+
+    assert response.status_code == 400
+
+
+def test_projected_limit_is_bounded(client, leads, monkeypatch):
+    monkeypatch.setattr(crud, "MAX_LEAD_ROWS", 2)
+
+    assert client.get("/api/leads?fields=id&limit=2").status_code == 200
+    assert client.get("/api/leads?fields=id&limit=3").status_code == 400
+    # SQLite treats LIMIT -1 as no limit, so non-positive limits must not get through
+    assert client.get("/api/leads?fields=id&limit=-1").status_code == 422
+    assert client.get("/api/leads?fields=id&limit=0").status_code == 422
@@ -0,0 +1,80 @@
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+
+from app import models, scheduler
+from app.db import engine
+from conftest import add_lead
+
+CSV_HEADER = "name,email,phone,source\n"
+
+
+def _import_csv(client, rows: str):
+    return client.post("/api/leads/import-csv", files={"file": ("leads.csv", CSV_HEADER + rows)})
+
+
+def test_csv_import_contacts_every_lead(client, db):
+    response = _import_csv(client, "A,a@example.com,111,csv\nB,b@example.com,222,csv\n")
+
+    assert response.status_code == 200
+    assert [lead["email"] for lead in response.json()] == ["a@example.com", "b@example.com"]
+    leads = db.query(models.Lead).all()
+    assert {lead.status for lead in leads} == {models.LeadStatus.CONTACTED}
+    assert all(lead.email_sent_at is not None for lead in leads)
+    assert db.query(models.MessageLog).count() == 4
+
+
+def test_csv_import_failure_still_contacts_leads_created_before_it(client, db):
+    response = _import_csv(client, "A,a@example.com,111,csv\nB,b@example.com,222,csv\nA again,a@example.com,333,csv\n")
+
+    assert response.status_code == 500
+    leads = db.query(models.Lead).order_by(models.Lead.id).all()
+    assert [lead.email for lead in leads] == ["a@example.com", "b@example.com"]
+    assert all(lead.status == models.LeadStatus.CONTACTED for lead in leads)
+    assert all(lead.email_sent_at is not None for lead in leads)
+
+
+def test_reminder_job_commits_each_chunk(db, monkeypatch):
+    contacted_at = datetime.utcnow() - timedelta(days=4)
+    for i in range(3):
+        add_lead(db, email=f"lead{i}@example.com", status=models.LeadStatus.CONTACTED, first_contact_at=contacted_at)
+
+    send_reminder_emails = scheduler.send_reminder_emails
+    batches = []
+
+    def failing_after_first_chunk(leads):
+        batches.append(len(leads))
+        if len(batches) > 1:
+            raise RuntimeError("SMTP server went away")
+        return send_reminder_emails(leads)
+
+    monkeypatch.setattr(scheduler, "REMINDER_CHUNK_SIZE", 2)
+    monkeypatch.setattr(scheduler, "send_reminder_emails", failing_after_first_chunk)
+    scheduler.check_for_reminders()
+
+    statuses = [lead.status for lead in db.query(models.Lead).order_by(models.Lead.id)]
+    assert batches == [2, 1]
+    assert statuses == [models.LeadStatus.REMINDER_SENT, models.LeadStatus.REMINDER_SENT, models.LeadStatus.CONTACTED]
+
+
+def test_init_db_adds_provider_message_id_to_existing_table(db):
+    # message_logs as created before provider_message_id was added
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE message_logs"))
+        conn.execute(text(
+            "CREATE TABLE message_logs (id INTEGER PRIMARY KEY, lead_id INTEGER, channel VARCHAR(8), kind VARCHAR(11), "
+            "sent_at DATETIME, provider_response VARCHAR, success BOOLEAN)"
+        ))
+    path = os.path.join(os.path.dirname(__file__), "..", "scripts", "init_db.py")
+    spec = importlib.util.spec_from_file_location("init_db", path)
+    init_db = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(init_db)
+
+    init_db.init_db()
+
+    assert "provider_message_id" in {column["name"] for column in inspect(engine).get_columns("message_logs")}
+    lead = add_lead(db)
+    db.add(models.MessageLog(lead_id=lead.id, channel=models.MessageChannel.EMAIL, kind=models.MessageKind.FIRST_TOUCH, success=True, provider_message_id="<id@example.com>"))
+    db.commit()
@@ -0,0 +1,71 @@
+import threading
+
+from sqlalchemy import text
+
+from app import profiling
+from app.db import SessionLocal
+
+
+def _run_profiled(func, record):
+    token = profiling._current.set(record)
+    try:
+        return func()
+    finally:
+        profiling._current.reset(token)
+
+
+def test_overlapping_profiled_calls_both_succeed_and_record_sql(monkeypatch):
+    monkeypatch.setattr(profiling.profiler, "enabled", False)
+    profiling.profiler.enable()
+    inside = threading.Barrier(2, timeout=5)
+
+    @profiling.profiled
+    def endpoint():
+        db = SessionLocal()
+        try:
+            inside.wait()
+            return db.execute(text("SELECT 1")).scalar()
+        finally:
+            db.close()
+
+    records = [profiling.ProfileRecord("request", f"request {i}") for i in range(2)]
+    results, errors = [], []
+
+    def worker(record):
+        try:
+            results.append(_run_profiled(endpoint, record))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(record,)) for record in records]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+    finally:
+        profiling.profiler.disable()
+
+    assert errors == []
+    assert results == [1, 1]
+    # Only one of them could hold the profiler, but both kept their SQL timings
+    assert sorted(record.pstats_dump() is not None for record in records) == [False, True]
+    assert all(record.sql_count == 1 for record in records)
+
+    # The profiler was released, so a later request is profiled again
+    later = profiling.ProfileRecord("request", "later")
+    _run_profiled(profiling.profiled(lambda: None), later)
+    assert later.pstats_dump() is not None
+
+
+def test_profile_is_skipped_when_another_profiler_is_active(monkeypatch):
+    class ActiveElsewhere:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", ActiveElsewhere)
+    record = profiling.ProfileRecord("request", "busy")
+
+    assert _run_profiled(profiling.profiled(lambda: "ok"), record) == "ok"
+    assert record.pstats_dump() is None
+    assert not profiling._cprofile_lock.locked()
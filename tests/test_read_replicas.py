@@ -0,0 +1,66 @@
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import config, main
+from conftest import add_lead
+
+
+def _seed(db, replica_db):
+    # The replica file is never written by the app, so its copy of lead 1 tells us which database served a read
+    add_lead(db, id=1, name="On Primary")
+    add_lead(replica_db, id=1, name="On Replica")
+
+
+def test_reads_go_to_replica(client, db, replica_db):
+    _seed(db, replica_db)
+
+    response = client.get("/api/leads/1")
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "On Replica"
+
+
+def test_reads_after_a_write_go_to_primary(client, db, replica_db):
+    _seed(db, replica_db)
+
+    write = client.post("/api/leads/1/mark-replied")
+    assert write.status_code == 200
+    assert main.LAST_WRITE_COOKIE in write.cookies
+
+    response = client.get("/api/leads/1")
+
+    assert response.json()["name"] == "On Primary"
+    assert response.json()["status"] == "REPLIED"
+
+
+def test_reads_go_back_to_replica_after_the_window(client, db, replica_db):
+    _seed(db, replica_db)
+    expired = time.time() - config.settings.READ_YOUR_WRITES_SECONDS - 1
+    client.cookies.set(main.LAST_WRITE_COOKIE, str(expired))
+
+    response = client.get("/api/leads/1")
+
+    assert response.json()["name"] == "On Replica"
+
+
+def test_failed_write_does_not_pin_client_to_primary(client, db, replica_db):
+    _seed(db, replica_db)
+
+    write = client.post("/api/leads/999/mark-replied")
+
+    assert write.status_code == 404
+    assert main.LAST_WRITE_COOKIE not in write.cookies
+    assert client.get("/api/leads/1").json()["name"] == "On Replica"
+
+
+def test_falls_back_to_primary_when_replica_is_unreachable(client, db, replica_db, monkeypatch):
+    _seed(db, replica_db)
+    unreachable = create_engine("sqlite:////nonexistent-dir/replica.db")
+    monkeypatch.setattr(main, "get_read_sessionmaker", lambda: sessionmaker(bind=unreachable))
+
+    response = client.get("/api/leads/1")
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "On Primary"
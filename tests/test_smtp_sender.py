@@ -0,0 +1,149 @@
+import time
+from email.message import EmailMessage
+from email.utils import make_msgid
+
+import pytest
+
+from app import config, models, smtp_sender
+from benchmarks.smtp_server import running_smtp_server
+
+
+def _message(to_email: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "hello@khwaish.example"
+    msg["To"] = to_email
+    msg["Subject"] = "Test"
+    msg["Message-ID"] = make_msgid(domain="khwaish.example")
+    msg.set_content("<p>Hello</p>\n.leading dot\n", subtype="html")
+    return msg
+
+
+def _pool(server, **kwargs) -> smtp_sender.SMTPConnectionPool:
+    return smtp_sender.SMTPConnectionPool(server.host, server.port, use_tls=False, timeout=5, **kwargs)
+
+
+class StubTokenCache:
+    """Hands out tokens in order, moving to the next one when invalidated."""
+
+    def __init__(self, *tokens):
+        self.tokens = list(tokens)
+        self.invalidated = 0
+
+    def get_token(self):
+        return self.tokens[0], time.monotonic() + 3600
+
+    def invalidate(self):
+        self.invalidated += 1
+        self.tokens.pop(0)
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_send_batch_keeps_input_order_and_reports_rejected_recipients(pipelining):
+    recipients = ["a@example.com", "reject-b@example.com", "c@example.com", "d@example.com", "reject-e@example.com", "f@example.com"]
+    messages = [_message(to_email) for to_email in recipients]
+
+    with running_smtp_server(pipelining=pipelining) as server:
+        pool = _pool(server, size=3)
+        try:
+            results = pool.send_batch(messages)
+        finally:
+            pool.close()
+
+    assert [result.message_id for result in results] == [message["Message-ID"] for message in messages]
+    assert [result.success for result in results] == ["reject" not in to_email for to_email in recipients]
+    assert "550" in results[1].provider_response
+    assert all("queued as" in result.provider_response for result in results if result.success)
+
+
+def test_rejected_recipient_does_not_break_the_connection():
+    with running_smtp_server() as server:
+        pool = _pool(server, size=1)
+        try:
+            results = pool.send_batch([_message("a@example.com"), _message("reject@example.com"), _message("b@example.com")])
+        finally:
+            pool.close()
+
+    assert [result.success for result in results] == [True, False, True]
+    assert server.stats.connections == 1
+
+
+def test_connections_are_reused_across_batches():
+    with running_smtp_server() as server:
+        pool = _pool(server, size=2)
+        try:
+            pool.send_batch([_message(f"first-{i}@example.com") for i in range(4)])
+            connections = server.stats.connections
+            results = pool.send_batch([_message(f"second-{i}@example.com") for i in range(4)])
+        finally:
+            pool.close()
+
+    assert all(result.success for result in results)
+    assert 1 <= connections <= 2
+    assert server.stats.connections == connections
+
+
+def test_connection_is_recycled_after_max_messages():
+    with running_smtp_server() as server:
+        pool = _pool(server, size=1, max_messages_per_connection=2)
+        try:
+            results = pool.send_batch([_message(f"lead-{i}@example.com") for i in range(5)])
+        finally:
+            pool.close()
+
+    assert all(result.success for result in results)
+    assert server.stats.messages == 5
+    assert server.stats.connections == 3
+
+
+def test_xoauth2_authenticates_with_the_cached_token():
+    token_cache = StubTokenCache("good-token")
+
+    with running_smtp_server(oauth_token="good-token") as server:
+        pool = _pool(server, size=1, username="hello@khwaish.example", token_cache=token_cache)
+        try:
+            first = pool.send(_message("a@example.com"))
+            second = pool.send(_message("b@example.com"))
+        finally:
+            pool.close()
+
+    assert first.success and second.success
+    assert token_cache.invalidated == 0
+    assert server.stats.auths == 1
+
+
+def test_rejected_xoauth2_token_is_invalidated_and_refreshed():
+    token_cache = StubTokenCache("expired-token", "good-token")
+
+    with running_smtp_server(oauth_token="good-token") as server:
+        pool = _pool(server, size=1, username="hello@khwaish.example", token_cache=token_cache)
+        try:
+            result = pool.send(_message("a@example.com"))
+        finally:
+            pool.close()
+
+    assert result.success
+    assert token_cache.invalidated == 1
+    assert server.stats.auths == 1
+    assert server.stats.connections == 2
+
+
+def test_provider_message_id_is_logged_with_smtp_backend(client, db, monkeypatch):
+    with running_smtp_server() as server:
+        monkeypatch.setattr(config.settings, "EMAIL_BACKEND", "smtp")
+        monkeypatch.setattr(config.settings, "SMTP_HOST", server.host)
+        monkeypatch.setattr(config.settings, "SMTP_PORT", server.port)
+        monkeypatch.setattr(config.settings, "SMTP_USE_TLS", False)
+        monkeypatch.setattr(config.settings, "FROM_EMAIL", "hello@khwaish.example")
+        smtp_sender.close_smtp_pool()
+        try:
+            response = client.post("/api/leads", json={"name": "Asha", "email": "asha@example.com", "source": "web_form"})
+        finally:
+            smtp_sender.close_smtp_pool()
+
+    assert response.status_code == 200
+    assert server.stats.messages == 1
+    lead = db.query(models.Lead).one()
+    email_log = db.query(models.MessageLog).filter(models.MessageLog.channel == models.MessageChannel.EMAIL).one()
+    assert email_log.success
+    assert email_log.provider_message_id is not None
+    assert email_log.provider_message_id == lead.email_thread_id == response.json()["email_thread_id"]